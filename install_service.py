@@ -2,10 +2,10 @@ import win32serviceutil
 import win32service
 import win32event
 import servicemanager
+import asyncio
 import socket
 import sys
 import os
-import subprocess
 
 class YeiMonitorService(win32serviceutil.ServiceFramework):
     _svc_name_ = "YeiMonitorService"
@@ -15,14 +15,38 @@ class YeiMonitorService(win32serviceutil.ServiceFramework):
     def __init__(self, args):
         win32serviceutil.ServiceFramework.__init__(self, args)
         self.stop_event = win32event.CreateEvent(None, 0, 0, None)
+        # 监控协程退出（包括清理完成）后置位，SvcStop据此等待
+        self.done_event = win32event.CreateEvent(None, 1, 0, None)
         socket.setdefaulttimeout(60)
-        self.process = None
+        self.loop = None
+        self.task = None
 
     def SvcStop(self):
         self.ReportServiceStatus(win32service.SERVICE_STOP_PENDING)
         win32event.SetEvent(self.stop_event)
-        if self.process:
-            self.process.terminate()
+        # SvcStop在服务控制线程中调用，需要线程安全地取消事件循环中的监控任务
+        if self.loop and self.task:
+            self.loop.call_soon_threadsafe(self.task.cancel)
+            # 最多等待5秒让监控系统关闭RPC会话等资源，避免服务控制线程被无限期阻塞
+            if win32event.WaitForSingleObject(self.done_event, 5000) != win32event.WAIT_OBJECT_0:
+                servicemanager.LogMsg(
+                    servicemanager.EVENTLOG_WARNING_TYPE,
+                    servicemanager.PID_INFO,
+                    ('%s did not finish cleanup within 5 seconds' % self._svc_name_)
+                )
+
+    def _shutdown_loop(self):
+        """与asyncio.run退出时相同：取消剩余任务并等待结束，关闭异步生成器后关闭事件循环"""
+        try:
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            self.loop.close()
 
     def SvcDoRun(self):
         try:
@@ -37,15 +61,27 @@ class YeiMonitorService(win32serviceutil.ServiceFramework):
             yei_dir = os.path.join(script_dir, "yei_monitor")
             os.chdir(yei_dir)
             
-            # 启动主程序
-            self.process = subprocess.Popen(
-                [sys.executable, "main.py"],
-                cwd=yei_dir,
-                creationflags=subprocess.CREATE_NEW_CONSOLE
-            )
+            # 主程序使用相对于yei_monitor目录的导入
+            sys.path.insert(0, yei_dir)
+            from main import run_monitor
+            
+            # 在服务进程内直接运行监控协程，不再启动新的Python进程
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.task = self.loop.create_task(run_monitor())
             
-            # 等待进程结束
-            self.process.wait()
+            # 任务创建前已收到停止请求
+            if win32event.WaitForSingleObject(self.stop_event, 0) == win32event.WAIT_OBJECT_0:
+                self.task.cancel()
+            try:
+                self.loop.run_until_complete(self.task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                try:
+                    self._shutdown_loop()
+                finally:
+                    win32event.SetEvent(self.done_event)
             
         except Exception as e:
             servicemanager.LogErrorMsg(str(e))
@@ -0,0 +1,9 @@
+import logging
+import os
+import sys
+
+# 主程序使用相对于yei_monitor目录的导入
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "yei_monitor"))
+
+# 测试中不写入yei_monitor.log
+logging.disable(logging.CRITICAL)
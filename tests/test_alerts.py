@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from utils.alerts import BatchingSender
+
+
+def notification(title, is_high_risk=False):
+    return {"title": title, "message": f"{title} message", "is_high_risk": is_high_risk, "call": "0"}
+
+
+class Recorder:
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, **kwargs):
+        self.sent.append(kwargs)
+        await asyncio.sleep(0.01)
+        return True
+
+
+def test_burst_is_merged_into_one_request():
+    send = Recorder()
+
+    async def run():
+        sender = BatchingSender(send, window=0.05)
+        futures = [sender.enqueue(notification(f"t{i}", is_high_risk=(i == 2))) for i in range(4)]
+        results = await asyncio.gather(*futures)
+        await sender.close()
+        return results
+
+    assert asyncio.run(run()) == [True] * 4
+    assert len(send.sent) == 1
+    # 标题使用其中最紧急的通知
+    assert send.sent[0]["title"] == "t2（4条）"
+    assert send.sent[0]["is_high_risk"]
+
+
+def test_max_batch_splits_requests():
+    send = Recorder()
+
+    async def run():
+        sender = BatchingSender(send, window=0.05, max_batch=2)
+        await asyncio.gather(*(sender.enqueue(notification(f"t{i}")) for i in range(5)))
+        await sender.close()
+
+    asyncio.run(run())
+
+    assert [len(sent["message"].split("---")) for sent in send.sent] == [2, 2, 1]
+
+
+def test_full_queue_drops_oldest():
+    send = Recorder()
+
+    async def run():
+        sender = BatchingSender(send, window=0, maxsize=2)
+        futures = [sender.enqueue(notification(f"t{i}")) for i in range(3)]
+        await asyncio.gather(*futures, return_exceptions=True)
+        await sender.close()
+        return futures
+
+    futures = asyncio.run(run())
+
+    assert futures[0].cancelled()
+    assert [future.result() for future in futures[1:]] == [True, True]
+
+
+def test_enqueue_after_close_is_rejected():
+    send = Recorder()
+
+    async def run():
+        sender = BatchingSender(send, window=0)
+        await sender.enqueue(notification("before"))
+        await sender.close()
+        late = sender.enqueue(notification("after"))
+        await asyncio.sleep(0.05)
+        return sender, late
+
+    sender, late = asyncio.run(run())
+
+    assert late.cancelled()
+    assert sender._worker is None
+    assert [sent["title"] for sent in send.sent] == ["before"]
@@ -0,0 +1,104 @@
+import asyncio
+import dataclasses
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("web3")
+pytest.importorskip("dotenv")
+
+from config.settings import Config
+from core.contract import ContractManager, _is_range_error
+
+
+@pytest.mark.parametrize("message", [
+    "query returned more than 10000 results",
+    "block range is too large",
+    "exceed maximum block range: 2000",
+    "Log response size exceeded",
+])
+def test_range_errors(message):
+    assert _is_range_error(ValueError({"code": -32005, "message": message}))
+
+
+@pytest.mark.parametrize("message", [
+    "rate limit exceeded",
+    "Too Many Requests",
+    "daily request count exceeded, request rate limited",
+    "execution reverted",
+])
+def test_other_errors_are_not_range_errors(message):
+    assert not _is_range_error(ValueError({"code": -32005, "message": message}))
+
+
+def make_manager(get_logs, **overrides):
+    config = dataclasses.replace(Config(), LOG_STREAM_MIN_BLOCKS=10 ** 9, **overrides)
+    manager = ContractManager(config)
+    manager.w3 = SimpleNamespace(eth=SimpleNamespace(get_logs=get_logs))
+    return manager
+
+
+def test_range_error_splits_until_accepted():
+    ranges = []
+
+    async def get_logs(filter_params):
+        from_block, to_block = filter_params['fromBlock'], filter_params['toBlock']
+        ranges.append((from_block, to_block))
+        if to_block - from_block + 1 > 250:
+            raise ValueError({"code": -32005, "message": "block range is too large"})
+        return []
+
+    manager = make_manager(get_logs, LOG_CHUNK_SIZE=1000, LOG_CHUNK_MIN=128)
+
+    assert asyncio.run(manager._get_events_in_range(1, 1000)) == []
+
+    accepted = [r for r in ranges if r[1] - r[0] + 1 <= 250]
+    assert accepted == [(1, 250), (251, 500), (501, 750), (751, 1000)]
+    # 每次拆分块大小减半，不低于LOG_CHUNK_MIN
+    assert manager.chunk_size == 128
+
+
+def test_range_error_stops_splitting_at_chunk_min():
+    ranges = []
+
+    async def get_logs(filter_params):
+        ranges.append((filter_params['fromBlock'], filter_params['toBlock']))
+        raise ValueError({"code": -32005, "message": "block range is too large"})
+
+    manager = make_manager(get_logs, LOG_CHUNK_SIZE=512, LOG_CHUNK_MIN=128)
+
+    with pytest.raises(ValueError):
+        asyncio.run(manager._get_events_in_range(1, 512))
+
+    # 512 -> 256 -> 128，达到LOG_CHUNK_MIN后直接抛出，不再继续拆分
+    assert min(to_block - from_block + 1 for from_block, to_block in ranges) == 128
+
+
+def test_rate_limit_is_raised_without_splitting():
+    ranges = []
+
+    async def get_logs(filter_params):
+        ranges.append((filter_params['fromBlock'], filter_params['toBlock']))
+        raise ValueError({"code": -32005, "message": "rate limit exceeded"})
+
+    manager = make_manager(get_logs, LOG_CHUNK_SIZE=1000)
+
+    with pytest.raises(ValueError):
+        asyncio.run(manager._get_events_in_range(1, 1000))
+
+    assert ranges == [(1, 1000)]
+    assert manager.chunk_size == 1000
+
+
+def test_chunk_size_grows_after_consecutive_successes():
+    async def get_logs(filter_params):
+        return []
+
+    manager = make_manager(get_logs, LOG_CHUNK_SIZE=1000, LOG_CHUNK_GROW_AFTER=2, LOG_CHUNK_MAX=3000)
+
+    async def run():
+        for start in range(1, 5001, 1000):
+            await manager._get_events_in_range(start, start + 999)
+
+    asyncio.run(run())
+
+    assert manager.chunk_size == 3000
@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("web3")
+pytest.importorskip("aiohttp")
+pytest.importorskip("dotenv")
+
+from core.monitor import YEIMonitor
+from core.state import ContractState
+
+
+def log(block_number, log_index):
+    return SimpleNamespace(event="Supply", blockNumber=block_number, logIndex=log_index)
+
+
+class FakeContractManager:
+    """get_all_events按区块范围返回预设的日志"""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def get_all_events(self, from_block, to_block):
+        return [event for event in self.events if from_block <= event.blockNumber <= to_block]
+
+    async def get_asset_liquidity_batch(self, asset_addresses):
+        return {}
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    monitor = YEIMonitor()
+    monitor.state = ContractState(checkpoint_path=str(tmp_path / "last_block"))
+    monitor.handled = []
+
+    async def handle(event):
+        monitor.handled.append((event.blockNumber, event.logIndex))
+
+    monitor.handle_implementation_event = handle
+    return monitor
+
+
+def test_is_handled_uses_checkpoint_block_and_last_event(monitor):
+    monitor.state.last_checked_block = 99
+    monitor.state.last_event = (100, 1)
+
+    assert monitor._is_handled(log(99, 5))
+    assert monitor._is_handled(log(100, 0))
+    assert monitor._is_handled(log(100, 1))
+    assert not monitor._is_handled(log(100, 2))
+    assert not monitor._is_handled(log(101, 0))
+
+
+def test_mark_handled_records_last_position(monitor):
+    monitor._mark_handled(log(100, 3))
+    assert monitor.state.last_event == (100, 3)
+
+    # 没有logIndex的事件不改变记录
+    monitor._mark_handled(SimpleNamespace(blockNumber=101))
+    assert monitor.state.last_event == (100, 3)
+
+
+def test_catch_up_after_reconnect_skips_logs_handled_by_subscription(monitor):
+    # 订阅在断开前已处理区块100的前两条日志
+    monitor.state.last_checked_block = 99
+    for event in (log(100, 0), log(100, 1)):
+        monitor._mark_handled(event)
+
+    monitor.contract_manager = FakeContractManager([log(100, 0), log(100, 1), log(100, 2), log(101, 0)])
+    asyncio.run(monitor._catch_up(101))
+
+    assert monitor.handled == [(100, 2), (101, 0)]
+    assert monitor.state.last_checked_block == 101
+    assert monitor.state.last_event == (101, 0)
+
+
+def test_handled_mark_survives_restart(monitor, tmp_path):
+    monitor.state.last_checked_block = 99
+    monitor._mark_handled(log(100, 1))
+    asyncio.run(monitor.state.persist())
+
+    # 重启后从检查点文件恢复
+    monitor.state = ContractState(checkpoint_path=str(tmp_path / "last_block"))
+    monitor.state.load_checkpoint()
+    monitor.contract_manager = FakeContractManager([log(100, 0), log(100, 1), log(100, 2)])
+    asyncio.run(monitor._catch_up(100))
+
+    assert monitor.handled == [(100, 2)]
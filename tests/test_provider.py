@@ -0,0 +1,134 @@
+import asyncio
+import orjson
+import pytest
+
+pytest.importorskip("web3")
+aiohttp = pytest.importorskip("aiohttp")
+pytest.importorskip("ijson")
+
+from core.provider import BatchingHTTPProvider
+
+
+class FakeProvider(BatchingHTTPProvider):
+    """_post返回handler生成的响应，不发出网络请求"""
+
+    def __init__(self, handler, **kwargs):
+        super().__init__("http://localhost:8545", **kwargs)
+        self.handler = handler
+        self.bodies = []
+
+    async def _post(self, body: bytes) -> bytes:
+        payload = orjson.loads(body)
+        self.bodies.append(payload)
+        return orjson.dumps(self.handler(payload))
+
+
+def result_for(request):
+    return {"jsonrpc": "2.0", "id": request["id"], "result": request["method"]}
+
+
+def answer_all(payload):
+    if isinstance(payload, list):
+        # 按倒序返回，验证按id而不是按位置分发
+        return [result_for(request) for request in reversed(payload)]
+    return result_for(payload)
+
+
+async def make_requests(provider, methods):
+    return await asyncio.gather(*(provider.make_request(method, []) for method in methods))
+
+
+def test_concurrent_requests_are_batched_and_mapped_by_id():
+    provider = FakeProvider(answer_all)
+    methods = ["eth_blockNumber", "eth_chainId", "eth_gasPrice"]
+
+    responses = asyncio.run(make_requests(provider, methods))
+
+    assert [response["result"] for response in responses] == methods
+    assert len(provider.bodies) == 1
+    assert isinstance(provider.bodies[0], list)
+
+
+def test_single_request_is_sent_without_batch():
+    provider = FakeProvider(answer_all)
+
+    response = asyncio.run(provider.make_request("eth_blockNumber", []))
+
+    assert response["result"] == "eth_blockNumber"
+    assert provider.bodies and isinstance(provider.bodies[0], dict)
+
+
+def test_batch_full_flushes_immediately():
+    provider = FakeProvider(answer_all, batch_window=10, max_batch_size=2)
+
+    responses = asyncio.run(asyncio.wait_for(make_requests(provider, ["a", "b"]), timeout=1))
+
+    assert [response["result"] for response in responses] == ["a", "b"]
+
+
+def test_missing_ids_are_retried_individually():
+    def drop_second(payload):
+        if isinstance(payload, list):
+            return [result_for(payload[0])]
+        return result_for(payload)
+
+    provider = FakeProvider(drop_second)
+
+    responses = asyncio.run(make_requests(provider, ["a", "b"]))
+
+    assert [response["result"] for response in responses] == ["a", "b"]
+    assert provider._batch_supported
+    assert isinstance(provider.bodies[1], dict) and provider.bodies[1]["method"] == "b"
+
+
+def test_batch_error_object_falls_back_to_single_requests():
+    def reject_batches(payload):
+        if isinstance(payload, list):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch not supported"}}
+        return result_for(payload)
+
+    provider = FakeProvider(reject_batches)
+
+    async def run():
+        first = await make_requests(provider, ["a", "b"])
+        second = await make_requests(provider, ["c", "d"])
+        return first + second
+
+    responses = asyncio.run(run())
+
+    assert [response["result"] for response in responses] == ["a", "b", "c", "d"]
+    assert not provider._batch_supported
+    # 只有第一次发送了批量请求，之后都单独发送
+    assert [isinstance(body, list) for body in provider.bodies] == [True, False, False, False, False]
+
+
+def test_http_error_on_batch_falls_back_to_single_requests():
+    class RejectingProvider(FakeProvider):
+        async def _post(self, body: bytes) -> bytes:
+            if body.startswith(b"["):
+                raise aiohttp.ClientResponseError(None, (), status=400)
+            return await super()._post(body)
+
+    provider = RejectingProvider(answer_all)
+
+    responses = asyncio.run(make_requests(provider, ["a", "b"]))
+
+    assert [response["result"] for response in responses] == ["a", "b"]
+    assert not provider._batch_supported
+
+
+def test_connection_error_fails_all_requests():
+    class DownProvider(FakeProvider):
+        async def _post(self, body: bytes) -> bytes:
+            raise aiohttp.ClientConnectionError("connection refused")
+
+    provider = DownProvider(answer_all)
+
+    async def run():
+        return await asyncio.gather(*(provider.make_request(m, []) for m in ["a", "b"]), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, aiohttp.ClientConnectionError) for result in results)
+    # 连接错误不代表节点不支持批量请求
+    assert provider._batch_supported
@@ -0,0 +1,61 @@
+import asyncio
+from core.state import ContractState
+
+
+def test_persist_and_load_checkpoint_round_trip(tmp_path):
+    path = tmp_path / "state" / "last_block"
+    state = ContractState(checkpoint_path=str(path))
+    state.last_checked_block = 1234
+    state.last_event = (1235, 7)
+
+    assert asyncio.run(state.persist())
+    assert path.read_text() == "1234\n1235 7\n"
+    assert not (tmp_path / "state" / "last_block.tmp").exists()
+
+    restored = ContractState(checkpoint_path=str(path))
+    assert restored.load_checkpoint() == 1234
+    assert restored.last_checked_block == 1234
+    assert restored.last_event == (1235, 7)
+
+
+def test_load_checkpoint_without_last_event(tmp_path):
+    # 只有区块号一行的旧格式检查点文件
+    path = tmp_path / "last_block"
+    path.write_text("500\n")
+    state = ContractState(checkpoint_path=str(path))
+
+    assert state.load_checkpoint() == 500
+    assert state.last_event == (0, -1)
+
+
+def test_load_checkpoint_missing_or_corrupt(tmp_path):
+    assert ContractState(checkpoint_path=str(tmp_path / "missing")).load_checkpoint() == 0
+    assert ContractState().load_checkpoint() == 0
+
+    path = tmp_path / "last_block"
+    path.write_text("not-a-number\n")
+    state = ContractState(checkpoint_path=str(path))
+    assert state.load_checkpoint() == 0
+    assert state.last_checked_block == 0
+
+
+def test_persist_respects_min_interval(tmp_path):
+    path = tmp_path / "last_block"
+    state = ContractState(checkpoint_path=str(path))
+
+    async def run():
+        state.last_checked_block = 1
+        assert await state.persist(60)
+        state.last_checked_block = 2
+        # 距上次写入不足60秒，跳过
+        assert not await state.persist(60)
+        assert path.read_text().split()[0] == "1"
+        # 0表示立即写入
+        assert await state.persist()
+        assert path.read_text().split()[0] == "2"
+
+    asyncio.run(run())
+
+
+def test_persist_without_path():
+    assert not asyncio.run(ContractState().persist())
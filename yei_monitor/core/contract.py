@@ -1,17 +1,71 @@
-from web3 import AsyncWeb3
+import asyncio
+import functools
+import re
+import time
+from web3 import AsyncWeb3, WebsocketProviderV2
+from eth_utils import collapse_if_tuple, event_abi_to_log_topic, function_abi_to_4byte_selector, to_checksum_address
+from eth_abi import decode as abi_decode, encode as abi_encode
+from eth_abi.exceptions import DecodingError
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+from web3.exceptions import LogTopicError, MismatchedABI
 from config.settings import Config
+from core.provider import BatchingHTTPProvider
 from utils.logger import setup_logger
 from utils.amount_utils import TOKEN_DECIMALS
 import json
 
 logger = setup_logger(__name__)
 
+# 节点返回的"区块范围过大/结果过多"类错误
+RANGE_ERROR_PATTERN = re.compile(r'(range|exceed|too large|max results|more than \d+ results|response size)', re.IGNORECASE)
+# 节点限流错误，与区块范围无关，拆分范围只会增加请求数
+RATE_LIMIT_PATTERN = re.compile(r'(rate.?limit|too many requests|request count)', re.IGNORECASE)
+
+# totalSupply()的函数选择器（keccak256("totalSupply()")的前4个字节）
+TOTAL_SUPPLY_SELECTOR = b'\x18\x16\x0d\xdd'
+
+# 日志与ABI不匹配或数据无法解码时抛出的异常
+LOG_DECODE_ERRORS = (LogTopicError, MismatchedABI, DecodingError)
+
+def _is_range_error(error: Exception) -> bool:
+    """判断节点错误是否为区块范围过大/结果过多，限流错误不算"""
+    message = str(error)
+    return bool(RANGE_ERROR_PATTERN.search(message)) and not RATE_LIMIT_PATTERN.search(message)
+
+@functools.lru_cache(maxsize=1024)
+def _to_checksum(address_lower: str) -> str:
+    """将小写地址转换为校验和格式，结果缓存，避免重复计算keccak256"""
+    return to_checksum_address(address_lower)
+
 class ContractManager:
+    # 关键资金安全事件的签名（topic0），直接以32字节的bytes作为键，
+    # 与日志中的HexBytes比较时无需转换为十六进制字符串
+    KEY_EVENT_SIGNATURES = {
+        # Supply事件的签名
+        bytes.fromhex("2b627736bca15cd5381dcf80b0bf11fd197d01a037c52b927a881a10fb73ba61"): "Supply",
+        # Withdraw事件的签名
+        bytes.fromhex("3115d1449a7b732c986cba18244e897a450f61e1bb8d589cd2e69e6c8924f9f7"): "Withdraw",
+        # Borrow事件的签名
+        bytes.fromhex("c6a898309e823ee50bac40dbae5b8d3b9fede325bbcba08b4a4c1896cd62dfab"): "Borrow",
+        # Repay事件的签名
+        bytes.fromhex("4cdde6e09bb755c9a5589ebaec640bbfedff1362d4b255ebf8339782b9942faa"): "Repay",
+        # LiquidationCall事件的签名
+        bytes.fromhex("e413a321e8681d831f4dbccbca790d2952b56f977908e45be37335533e005286"): "LiquidationCall",
+        # FlashLoan事件的签名
+        bytes.fromhex("631042c832b07452973831137f2d73e395028b44b250dedc5abb0ee766e168ac"): "FlashLoan",
+    }
+    # eth_getLogs的topics[0]支持数组（OR匹配），一次请求即可获取全部关键事件
+    KEY_TOPIC0 = [HexBytes(sig) for sig in KEY_EVENT_SIGNATURES]
+
     def __init__(self, config: Config):
         self.config = config
         # 使用EVM兼容的RPC端点
-        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(
+        # 同一时间窗口内的并发请求会被合并为一次JSON-RPC批量请求
+        self.w3 = AsyncWeb3(BatchingHTTPProvider(
             config.RPC_URL,
+            batch_window=config.RPC_BATCH_WINDOW,
+            max_batch_size=config.RPC_MAX_BATCH_SIZE,
             request_kwargs={
                 'headers': {
                     'Content-Type': 'application/json',
@@ -21,227 +75,348 @@ class ContractManager:
         
         # 注意：在可升级代理模式中，我们使用代理地址但使用实现合约的ABI
         # 这是因为事件从代理合约地址发出，但事件的结构和定义来自实现合约
+        self._checksum_proxy = _to_checksum(config.PROXY_ADDRESS.lower())
+        # 链ID在test_rpc_connection中获取一次后缓存
+        self.chain_id = None
         self.contract = self.w3.eth.contract(
-            address=self.w3.to_checksum_address(config.PROXY_ADDRESS),
+            address=self._checksum_proxy,
             abi=config.IMPLEMENTATION_ABI
         )
 
+        # 自适应的eth_getLogs区块块大小
+        self.chunk_size = config.LOG_CHUNK_SIZE
+        self._chunk_successes = 0
+
+        # Multicall3合约，是否已部署在首次使用时检查
+        self.multicall = self.w3.eth.contract(
+            address=_to_checksum(config.MULTICALL3_ADDRESS.lower()),
+            abi=config.MULTICALL3_ABI
+        )
+        self._multicall_available = None
+
+        # 资产储备数据及代币合约对象缓存，键为资产的校验和地址
+        self._reserve_cache = {}   # {asset: (过期时间, reserve_data)}
+        self._token_addresses = {} # {asset: (aToken, 可变利率债务代币, 固定利率债务代币)}
+        # 资产流动性短时缓存，键为资产的小写地址
+        self._liquidity_cache = {} # {asset: (过期时间, liquidity)}
+
+        # getReserveData的函数选择器和返回类型，用于通过Multicall3批量获取储备数据
+        reserve_data_abi = next(
+            item for item in config.IMPLEMENTATION_ABI
+            if item.get('type') == 'function' and item['name'] == 'getReserveData'
+        )
+        self._reserve_data_selector = function_abi_to_4byte_selector(reserve_data_abi)
+        self._reserve_data_types = [collapse_if_tuple(output) for output in reserve_data_abi['outputs']]
+
+        # 关键事件的topic0 -> 事件名称
+        self._topic0_to_name = dict(self.KEY_EVENT_SIGNATURES)
+        # 关键事件的topic0 -> 解码函数，初始化时根据ABI生成一次
+        self._decoders = self._build_decoders(config.IMPLEMENTATION_ABI)
+
+    def _build_decoders(self, abi):
+        """为关键事件预先生成解码函数
+
+        Returns:
+            dict: {topic0: decode(log) -> AttributeDict}
+        """
+        decoders = {}
+        for event_abi in abi:
+            if event_abi.get('type') != 'event':
+                continue
+            topic0 = HexBytes(event_abi_to_log_topic(event_abi))
+            if topic0 in self._topic0_to_name:
+                decoders[topic0] = self._make_decoder(event_abi)
+        return decoders
+
+    @staticmethod
+    def _make_decoder(event_abi):
+        """生成单个事件的解码函数
+
+        参数名、类型和地址参数的位置在生成时确定并绑定到闭包中。
+        解码函数直接调用eth_abi解码topics和data，跳过web3.py的process_log对ABI的重复处理，
+        返回与process_log结构相同的AttributeDict，地址参数为校验和格式；
+        topics数量与ABI不匹配时抛出LogTopicError，data无法解码时抛出DecodingError
+        """
+        event_name = event_abi['name']
+        topic_inputs = [i for i in event_abi['inputs'] if i['indexed']]
+        data_inputs = [i for i in event_abi['inputs'] if not i['indexed']]
+        topic_types = [i['type'] for i in topic_inputs]
+        data_types = [i['type'] for i in data_inputs]
+        topic_count = len(topic_types) + 1
+        # 按先topics后data的解码顺序排列参数名，并标记地址参数
+        fields = [(i['name'], i['type'] == 'address') for i in topic_inputs + data_inputs]
+
+        def decode(log):
+            topics = log['topics']
+            if len(topics) != topic_count:
+                raise LogTopicError(f"{event_name} 事件的topics数量与ABI不匹配")
+            values = (
+                abi_decode(topic_types, b''.join(bytes(topic) for topic in topics[1:]))
+                + abi_decode(data_types, HexBytes(log['data']))
+            )
+            args = {
+                name: _to_checksum(value) if is_address else value
+                for (name, is_address), value in zip(fields, values)
+            }
+            return AttributeDict({
+                'args': AttributeDict(args),
+                'event': event_name,
+                'logIndex': log.get('logIndex'),
+                'transactionIndex': log.get('transactionIndex'),
+                'transactionHash': log.get('transactionHash'),
+                'address': log.get('address'),
+                'blockHash': log.get('blockHash'),
+                'blockNumber': log.get('blockNumber'),
+            })
+
+        return decode
+
+    async def close(self):
+        """关闭RPC连接使用的HTTP会话"""
+        await self.w3.provider.close()
+
     async def test_rpc_connection(self) -> bool:
         """测试RPC连接和合约调用"""
         try:
             # 测试基本RPC连接
-            logger.info(f"正在测试RPC连接: {self.config.RPC_URL}")
-            chain_id = await self.w3.eth.chain_id
-            latest_block = await self.w3.eth.block_number
-            logger.info(f"链ID: {chain_id}, 最新区块: {latest_block}")
+            logger.info("正在测试RPC连接: %s", self.config.RPC_URL)
+            # 链ID不会变化，只获取一次并缓存；两个请求合并为一次批量请求
+            self.chain_id, latest_block = await self.batch_call(
+                self.w3.eth.chain_id,
+                self.w3.eth.block_number
+            )
+            logger.info("链ID: %s, 最新区块: %s", self.chain_id, latest_block)
 
             # 测试合约调用
             logger.info("正在测试合约调用...")
             try:
                 # 尝试获取池版本
                 pool_revision = await self.contract.functions.POOL_REVISION().call()
-                logger.info(f"池版本: {pool_revision}")
+                logger.info("池版本: %s", pool_revision)
                 
                 logger.info("合约调用测试成功")
             except Exception as e:
-                logger.error(f"合约调用失败: {str(e)}")
+                logger.error("合约调用失败: %s", e)
                 raise
 
             logger.info("RPC连接测试完成，一切正常")
             return True
 
         except Exception as e:
-            logger.error(f"RPC连接测试失败: {str(e)}")
+            logger.error("RPC连接测试失败: %s", e)
             return False
 
-    async def get_implementation_address(self) -> str:
-        """获取实现合约地址"""
-        return self.config.PROXY_ADDRESS
-        
-    async def create_event_filter(self, event_name, from_block):
-        """创建事件过滤器
-        
-        在可升级代理模式中，我们监控代理合约地址发出的事件，
-        但使用实现合约的ABI来解析这些事件
+    async def batch_call(self, *calls) -> list:
+        """并发执行多个互不依赖的RPC调用
+
+        Provider会把同一时间窗口内发起的请求合并为一个JSON-RPC批量请求，
+        因此这些调用只需一次HTTP往返
         
         Args:
-            event_name: 要监控的事件名称
-            from_block: 起始区块
+            calls: RPC调用的协程，如w3.eth.block_number、contract.functions.xxx().call()
             
         Returns:
-            事件过滤器对象
+            list: 与calls顺序一致的结果，任一调用失败时抛出异常
         """
-        try:
-            # 获取当前区块
-            latest_block = await self.w3.eth.block_number
-            to_block = min(latest_block, from_block + 1000)  # 限制区块范围
-            
-            # 获取事件函数对象
-            event_function = getattr(self.contract.events, event_name)
-            
-            # 创建过滤器参数
-            filter_params = {
-                'fromBlock': from_block,
-                'toBlock': to_block,
-                'address': self.w3.to_checksum_address(self.config.PROXY_ADDRESS)
-            }
-            
-            return {
-                'filter': filter_params,
-                'event_name': event_name,
-                'event_function': event_function
-            }
-        except Exception as e:
-            return None
-    
+        return list(await asyncio.gather(*calls))
+
+    async def get_implementation_address(self) -> str:
+        """获取实现合约地址"""
+        return self.config.PROXY_ADDRESS
+        
     async def get_all_events(self, from_block, to_block=None):
         """获取关键资金安全相关事件
         
-        只监听与资金安全相关的特定事件类型，减少解析错误并提高系统效率
+        只监听与资金安全相关的特定事件类型，减少解析错误并提高系统效率。
+        通过一次topics[0]为签名数组的eth_getLogs请求获取全部关键事件，
+        再按topic0分发给对应的解码函数解析。
+        
+        区块范围按自适应的块大小分段查询：节点返回范围过大/结果过多的错误时
+        将块大小减半并拆分重试，连续成功若干次后将块大小加倍
         
         Args:
             from_block: 起始区块
-            to_block: 结束区块，默认为当前区块
+            to_block: 结束区块（包含），默认为当前区块
             
         Returns:
             事件列表
+            
+        Raises:
+            Exception: 无法获取某段区块的事件时抛出，调用方应保留原检查点并重试
         """
         try:
             if to_block is None:
                 to_block = await self.w3.eth.block_number
                 
-            # 限制区块范围，避免请求过大
-            if to_block - from_block > 1000:
-                logger.warning(f"区块范围过大，限制为1000个区块")
-                to_block = from_block + 1000
-                
-            logger.info(f"获取事件，区块范围: {from_block} - {to_block}")
+            logger.debug("获取事件，区块范围: %s - %s", from_block, to_block)
             
-            # 存储所有事件的列表
             all_events = []
+            start = from_block
+            while start <= to_block:
+                # 注意结束区块是包含在内的
+                end = min(start + self.chunk_size - 1, to_block)
+                all_events.extend(await self._get_events_in_range(start, end))
+                start = end + 1
             
-            # 定义关键安全事件列表
-            key_events = [
-                'Supply',      # 存款事件
-                'Withdraw',    # 提款事件
-                'Borrow',      # 借款事件
-                'Repay',       # 还款事件
-                'LiquidationCall',  # 清算事件
-                'FlashLoan'    # 闪电贷事件
-            ]
-            
-            # 只监听关键事件
-            for event_name in key_events:
-                try:
-                    # 创建特定事件的过滤器信息
-                    filter_info = await self.create_event_filter(event_name, from_block)
-                    if filter_info:
-                        # 获取事件
-                        try:
-                            # 使用Web3的getLogs方法获取日志
-                            logs = await self.w3.eth.get_logs(filter_info['filter'])
-                            
-                            # 解析日志为事件
-                            events = []
-                            for log in logs:
-                                try:
-                                    # 使用相应的事件函数处理日志
-                                    parsed_event = filter_info['event_function']().process_log(log)
-                                    events.append(parsed_event)
-                                except:
-                                    # 尝试使用基本解析作为备用方法
-                                    basic_event = await self.basic_decode_log(log)
-                                    if basic_event and basic_event.event == event_name:
-                                        events.append(basic_event)
-                            
-                            all_events.extend(events)
-                        except Exception as e:
-                            logger.error(f"获取 {event_name} 事件日志失败: {str(e)}")
-                except Exception as e:
-                    logger.error(f"获取 {event_name} 事件失败: {str(e)}")
-            
-            logger.info(f"总共获取到 {len(all_events)} 个关键安全事件")
+            logger.debug("总共获取到 %s 个关键安全事件", len(all_events))
             return all_events
         except Exception as e:
-            logger.error(f"获取事件失败: {str(e)}")
-            return []
-            
-    async def decode_log(self, log):
-        """解码日志事件
-        
-        使用实现合约的ABI解析从代理合约发出的事件
-        """
+            logger.error("获取事件失败: %s", e)
+            raise
+
+    async def _get_events_in_range(self, from_block, to_block):
+        """获取一段区块范围内的关键事件，范围过大时自动拆分"""
+        filter_params = {
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': self._checksum_proxy,
+            'topics': [self.KEY_TOPIC0]
+        }
         try:
-            # 尝试解码日志
-            for event_name in self.contract.events:
-                try:
-                    decoded_event = self.contract.events[event_name]().process_log(log)
-                    return decoded_event
-                except:
-                    continue
-            
-            # 如果标准解码失败，尝试低级别解析
-            return await self.basic_decode_log(log)
+            # 区块范围较大时响应可能有几十MB，改为流式解析，边接收边解码
+            if to_block - from_block + 1 >= self.config.LOG_STREAM_MIN_BLOCKS:
+                events = await self._stream_events(filter_params)
+            else:
+                events = None
+                logs = await self.w3.eth.get_logs(filter_params)
         except Exception as e:
-            logger.error(f"解码日志失败: {str(e)}")
-            return None
+            # 已缩小到最小块大小或不是范围过大的错误时交给调用方退避重试
+            if to_block - from_block + 1 <= self.config.LOG_CHUNK_MIN or not _is_range_error(e):
+                raise
+            
+            # 范围过大，缩小块大小并将当前范围对半拆分
+            self.chunk_size = max(self.config.LOG_CHUNK_MIN, self.chunk_size // 2)
+            self._chunk_successes = 0
+            middle = from_block + (to_block - from_block) // 2
+            logger.warning("区块范围 %s - %s 过大，拆分查询，块大小调整为 %s: %s", from_block, to_block, self.chunk_size, e)
+            first_half = await self._get_events_in_range(from_block, middle)
+            second_half = await self._get_events_in_range(middle + 1, to_block)
+            return first_half + second_half
+        
+        # 连续成功后逐步放大块大小，减少请求次数
+        self._chunk_successes += 1
+        if self._chunk_successes >= self.config.LOG_CHUNK_GROW_AFTER:
+            self.chunk_size = min(self.config.LOG_CHUNK_MAX, self.chunk_size * 2)
+            self._chunk_successes = 0
+        
+        if events is not None:
+            return events
         
-    async def basic_decode_log(self, log):
-        """基本日志解析
+        # 日志较多时解码占用CPU较长时间，交给线程池执行
+        if len(logs) > self.config.LOG_DECODE_OFFLOAD:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._decode_logs, logs)
+        return self._decode_logs(logs)
+
+    async def _stream_events(self, filter_params):
+        """流式获取一段区块的日志，每收到一条日志立即解码"""
+        events = []
+        async for raw_log in self.w3.provider.stream_logs(filter_params):
+            event = self._decode_log_entry(self._normalize_log(raw_log))
+            if event is not None:
+                events.append(event)
+        return events
+
+    @staticmethod
+    def _normalize_log(raw_log):
+        """将节点返回的原始日志（十六进制字符串）转换为与web3.py get_logs相同的格式"""
+        def to_int(value):
+            return int(value, 16) if value else None
+        
+        def to_bytes(value):
+            return HexBytes(value) if value else None
         
-        当标准解析失败时，尝试从topics中提取基本信息
+        return AttributeDict({
+            'address': _to_checksum(raw_log['address'].lower()),
+            'topics': [HexBytes(topic) for topic in raw_log.get('topics', [])],
+            'data': HexBytes(raw_log.get('data', '0x')),
+            'blockNumber': to_int(raw_log.get('blockNumber')),
+            'blockHash': to_bytes(raw_log.get('blockHash')),
+            'transactionHash': to_bytes(raw_log.get('transactionHash')),
+            'transactionIndex': to_int(raw_log.get('transactionIndex')),
+            'logIndex': to_int(raw_log.get('logIndex')),
+            'removed': raw_log.get('removed', False),
+        })
+
+    async def subscribe_logs(self, on_subscribed=None):
+        """通过WebSocket订阅代理合约的关键事件日志，逐个返回解析后的事件
+
+        连接断开或订阅失败时抛出异常，由调用方负责重连
+        
+        Args:
+            on_subscribed: 订阅建立后调用的协程函数，用于补齐断线期间遗漏的区块
         """
-        try:
-            # 常见事件签名 - 只保留关键安全事件
-            event_signatures = {
-                # Supply事件的签名
-                "0x2b627736bca15cd5381dcf80b0bf11fd197d01a037c52b927a881a10fb73ba61": "Supply",
-                # Withdraw事件的签名
-                "0x3115d1449a7b732c986cba18244e897a450f61e1bb8d589cd2e69e6c8924f9f7": "Withdraw",
-                # Borrow事件的签名
-                "0xc6a898309e823ee50bac40dbae5b8d3b9fede325bbcba08b4a4c1896cd62dfab": "Borrow",
-                # Repay事件的签名
-                "0x4cdde6e09bb755c9a5589ebaec640bbfedff1362d4b255ebf8339782b9942faa": "Repay",
-                # LiquidationCall事件的签名
-                "0xe413a321e8681d831f4dbccbca790d2952b56f977908e45be37335533e005286": "LiquidationCall",
-                # FlashLoan事件的签名
-                "0x631042c832b07452973831137f2d73e395028b44b250dedc5abb0ee766e168ac": "FlashLoan",
-            }
+        provider = WebsocketProviderV2(self.config.WS_URL)
+        async with AsyncWeb3.persistent_websocket(provider) as ws_w3:
+            subscription_id = await ws_w3.eth.subscribe('logs', {
+                'address': self._checksum_proxy,
+                'topics': [self.KEY_TOPIC0]
+            })
+            logger.info("WebSocket订阅已建立: %s", subscription_id)
             
-            if not log.get('topics') or len(log.get('topics', [])) == 0:
-                return None
+            if on_subscribed is not None:
+                await on_subscribed()
             
-            # 获取事件签名（第一个topic）
-            event_signature = log['topics'][0].hex()
-            event_name = event_signatures.get(event_signature)
-            
-            if not event_name:
-                return None  # 忽略非关键事件
-            
-            # 创建一个基本的事件对象
-            basic_event = {
-                'event': event_name,
-                'address': log.get('address', ''),
-                'blockNumber': log.get('blockNumber', 0),
-                'transactionHash': log.get('transactionHash', '').hex() if log.get('transactionHash') else '',
-                'topics': [t.hex() for t in log.get('topics', [])],
-                'data': log.get('data', ''),
-                'args': {}  # 空参数，因为我们无法解析
-            }
-            
-            # 尝试从topics提取一些基本参数
-            if len(log.get('topics', [])) > 1:
-                try:
-                    # 第二个topic通常是地址（如用户地址）
-                    address = '0x' + log['topics'][1].hex()[-40:]
-                    basic_event['args']['address'] = self.w3.to_checksum_address(address)
-                except:
-                    pass
-            
-            return type('BasicEvent', (), basic_event)  # 创建一个简单的对象
-        except Exception as e:
-            logger.error(f"基本日志解析失败: {str(e)}")
+            async for response in ws_w3.ws.process_subscriptions():
+                log = response.get('result')
+                # 区块重组时节点会重新推送被移除的日志
+                if not log or log.get('removed'):
+                    continue
+                if isinstance(log.get('blockNumber'), str):
+                    log = self._normalize_log(log)
+                event = self._decode_log_entry(log)
+                if event is not None:
+                    yield event
+
+    def _decode_logs(self, logs):
+        """将一段区块的原始日志解析为事件列表"""
+        events = []
+        for log in logs:
+            event = self._decode_log_entry(log)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _decode_log_entry(self, log):
+        """解析单条关键事件日志，不是关键事件时返回None"""
+        # 节点已按topics[0]过滤，这里按topic0找到事件名称和对应的ABI解析
+        if not log.get('topics'):
+            return None
+        topic0 = log['topics'][0]
+        decoder = self._decoders.get(topic0)
+        if decoder is None:
             return None
+        try:
+            return decoder(log)
+        except LOG_DECODE_ERRORS as e:
+            # ABI解析失败时使用基本解析作为备用方法
+            event_name = self._topic0_to_name[topic0]
+            logger.warning("%s 事件ABI解析失败，使用基本解析: %s", event_name, e)
+            return self._synthesize_basic_event(log, event_name)
+            
+    def _synthesize_basic_event(self, log, event_name):
+        """根据日志的topics构建只包含基本信息的事件对象"""
+        # 创建一个基本的事件对象
+        basic_event = {
+            'event': event_name,
+            'address': log.get('address', ''),
+            'blockNumber': log.get('blockNumber', 0),
+            'transactionHash': log.get('transactionHash', '').hex() if log.get('transactionHash') else '',
+            'topics': list(log.get('topics', [])),  # 保留原始字节，需要时再转换为十六进制
+            'data': log.get('data', ''),
+            'args': {}  # 空参数，因为我们无法解析
+        }
+        
+        # 尝试从topics提取一些基本参数
+        if len(log.get('topics', [])) > 1:
+            try:
+                # 第二个topic通常是地址（如用户地址）
+                address = '0x' + bytes(log['topics'][1][-20:]).hex()
+                basic_event['args']['address'] = _to_checksum(address)
+            except ValueError:
+                pass
+        
+        return type('BasicEvent', (), basic_event)  # 创建一个简单的对象
 
     async def get_reserve_data(self, asset_address):
         """获取特定资产的储备数据
@@ -253,34 +428,38 @@ class ContractManager:
             dict: 包含资产储备数据的字典
         """
         try:
-            asset_address = self.w3.to_checksum_address(asset_address)
+            asset_address = _to_checksum(asset_address.lower())
             reserve_data = await self.contract.functions.getReserveData(asset_address).call()
+            data = self._reserve_data_to_dict(reserve_data)
             
-            # 根据YEI合约的getReserveData返回结构调整字段映射
-            # 参考实现合约ABI中的ReserveData结构
-            data = {
-                "configuration": reserve_data[0],
-                "liquidityIndex": reserve_data[1],
-                "currentLiquidityRate": reserve_data[2],
-                "variableBorrowIndex": reserve_data[3],
-                "currentVariableBorrowRate": reserve_data[4],
-                "currentStableBorrowRate": reserve_data[5],
-                "lastUpdateTimestamp": reserve_data[6],
-                "id": reserve_data[7],
-                "aTokenAddress": reserve_data[8],
-                "stableDebtTokenAddress": reserve_data[9],
-                "variableDebtTokenAddress": reserve_data[10],
-                "interestRateStrategyAddress": reserve_data[11],
-                "accruedToTreasury": reserve_data[12] if len(reserve_data) > 12 else 0,
-                "unbacked": reserve_data[13] if len(reserve_data) > 13 else 0,
-                "isolationModeTotalDebt": reserve_data[14] if len(reserve_data) > 14 else 0
-            }
-            
-            logger.debug(f"获取到资产储备数据 - 地址: {asset_address}")
+            logger.debug("获取到资产储备数据 - 地址: %s", asset_address)
             return data
         except Exception as e:
-            logger.error(f"获取资产储备数据失败 - 地址: {asset_address}, 错误: {str(e)}")
+            logger.error("获取资产储备数据失败 - 地址: %s, 错误: %s", asset_address, e)
             return None
+
+    @staticmethod
+    def _reserve_data_to_dict(reserve_data):
+        """将getReserveData的返回值转换为字典"""
+        # 根据YEI合约的getReserveData返回结构调整字段映射
+        # 参考实现合约ABI中的ReserveData结构
+        return {
+            "configuration": reserve_data[0],
+            "liquidityIndex": reserve_data[1],
+            "currentLiquidityRate": reserve_data[2],
+            "variableBorrowIndex": reserve_data[3],
+            "currentVariableBorrowRate": reserve_data[4],
+            "currentStableBorrowRate": reserve_data[5],
+            "lastUpdateTimestamp": reserve_data[6],
+            "id": reserve_data[7],
+            "aTokenAddress": reserve_data[8],
+            "stableDebtTokenAddress": reserve_data[9],
+            "variableDebtTokenAddress": reserve_data[10],
+            "interestRateStrategyAddress": reserve_data[11],
+            "accruedToTreasury": reserve_data[12] if len(reserve_data) > 12 else 0,
+            "unbacked": reserve_data[13] if len(reserve_data) > 13 else 0,
+            "isolationModeTotalDebt": reserve_data[14] if len(reserve_data) > 14 else 0
+        }
             
     async def get_asset_liquidity(self, asset_address):
         """获取特定资产的流动性信息
@@ -292,101 +471,262 @@ class ContractManager:
             dict: 包含流动性信息的字典
         """
         try:
-            asset_address = self.w3.to_checksum_address(asset_address)
+            # 只规范化一次地址，后续直接使用校验和地址
+            asset_lower = asset_address.lower()
+            asset_address = _to_checksum(asset_lower)
             
             # 获取资产的代币信息 - 将地址转为小写进行查询
-            token_info = TOKEN_DECIMALS.get(asset_address.lower())
+            token_info = TOKEN_DECIMALS.get(asset_lower)
             if not token_info:
-                logger.error(f"未找到资产信息 - 地址: {asset_address}")
+                logger.error("未找到资产信息 - 地址: %s", asset_address)
                 return None
             
-            # 获取资产的AToken合约地址
-            reserve_data = await self.get_reserve_data(asset_address)
-            if not reserve_data:
-                logger.error(f"无法获取资产储备数据 - 地址: {asset_address}")
+            # 获取资产的AToken和债务代币地址（带缓存）
+            token_addresses = await self._get_token_addresses(asset_address)
+            if not token_addresses:
                 return None
-                
-            a_token_address = reserve_data.get('aTokenAddress')
-            if not a_token_address:
-                logger.error(f"无法获取AToken地址 - 资产: {asset_address}")
-                return None
-                
-            # 获取AToken的总供应量（等于总存款量）
-            a_token = self.w3.eth.contract(
-                address=self.w3.to_checksum_address(a_token_address),
-                abi=self.config.ATOKEN_ABI  # 使用完整的aToken ABI
-            )
             
-            try:
-                total_supply = await a_token.functions.totalSupply().call()
-                logger.debug(f"成功获取totalSupply: {total_supply}")
-            except Exception as e:
-                # 尝试使用简化ABI
-                try:
-                    logger.debug("尝试使用简化ABI")
-                    simple_abi = [{"inputs":[],"name":"totalSupply","outputs":[{"internalType":"uint256","name":"","type":"uint256"}],"stateMutability":"view","type":"function"}]
-                    simple_contract = self.w3.eth.contract(
-                        address=self.w3.to_checksum_address(a_token_address),
-                        abi=simple_abi
-                    )
-                    total_supply = await simple_contract.functions.totalSupply().call()
-                except Exception as simple_error:
-                    # 尝试使用不同的方法获取totalSupply
-                    try:
-                        logger.debug("尝试通过其他方式调用")
-                        total_supply = await self.w3.eth.call(
-                            {"to": self.w3.to_checksum_address(a_token_address), 
-                             "data": self.w3.keccak(text="totalSupply()")[0:4].hex()})
-                        total_supply = int(total_supply.hex(), 16)
-                        logger.debug(f"通过raw call获取totalSupply成功: {total_supply}")
-                    except Exception as raw_error:
-                        logger.error(f"通过raw call调用失败: {str(raw_error)}")
-                        total_supply = 0
-            
-            # 获取借款代币合约地址
-            variable_debt_token_address = reserve_data.get('variableDebtTokenAddress')
-            stable_debt_token_address = reserve_data.get('stableDebtTokenAddress')
-            
-            # 获取借款总额
-            total_borrows = 0
-            if variable_debt_token_address:
-                variable_debt_token = self.w3.eth.contract(
-                    address=self.w3.to_checksum_address(variable_debt_token_address),
-                    abi=self.config.ATOKEN_ABI  # 使用ATOKEN_ABI替代ERC20_ABI
-                )
-                try:
-                    variable_borrows = await variable_debt_token.functions.totalSupply().call()
-                    total_borrows += variable_borrows
-                except Exception as e:
-                    logger.error(f"获取可变利率借款总额失败: {str(e)}")
-            
-            if stable_debt_token_address:
-                stable_debt_token = self.w3.eth.contract(
-                    address=self.w3.to_checksum_address(stable_debt_token_address),
-                    abi=self.config.ATOKEN_ABI  # 使用ATOKEN_ABI替代ERC20_ABI
-                )
-                try:
-                    stable_borrows = await stable_debt_token.functions.totalSupply().call()
-                    total_borrows += stable_borrows
-                except Exception as e:
-                    logger.error(f"获取固定利率借款总额失败: {str(e)}")
+            # 获取AToken总供应量（等于总存款量）和借款总额
+            total_supplies = await self._get_total_supplies(token_addresses)
+            return self._build_liquidity(token_info, total_supplies)
             
-            # 计算利用率
-            utilization_rate = 0
-            if total_supply > 0:
-                utilization_rate = (total_borrows / total_supply) * 100
+        except Exception as e:
+            logger.error("获取资产流动性信息失败: %s", e)
+            return None
+
+    @staticmethod
+    def _build_liquidity(token_info, total_supplies) -> dict:
+        """根据aToken和债务代币的totalSupply计算资产流动性信息"""
+        total_supply, variable_borrows, stable_borrows = total_supplies
+        total_borrows = variable_borrows + stable_borrows
+        
+        # 计算利用率
+        utilization_rate = 0
+        if total_supply > 0:
+            utilization_rate = (total_borrows / total_supply) * 100
+        
+        # 返回资产流动性信息
+        return {
+            "symbol": token_info.symbol,
+            "decimals": token_info.decimals,
+            "totalSupply": total_supply,
+            "totalBorrows": total_borrows,
+            "availableLiquidity": total_supply - total_borrows,
+            "utilizationRate": utilization_rate
+        }
+
+    async def get_asset_liquidity_batch(self, asset_addresses) -> dict:
+        """批量获取多个资产的流动性信息
+        
+        流动性在LIQUIDITY_CACHE_TTL内直接使用缓存，只查询未缓存或已过期的资产。
+        未缓存的储备数据通过一次Multicall3获取，所有资产的totalSupply再通过一次Multicall3获取，
+        储备数据已缓存时只需一次eth_call。Multicall3不可用时回退为并发调用get_asset_liquidity
+        
+        Args:
+            asset_addresses: 资产合约地址列表
             
-            # 返回资产流动性信息
-            return {
-                "symbol": token_info["symbol"],
-                "decimals": token_info["decimals"],
-                "totalSupply": total_supply,
-                "totalBorrows": total_borrows,
-                "availableLiquidity": total_supply - total_borrows,
-                "utilizationRate": utilization_rate
+        Returns:
+            dict: {资产小写地址: 流动性信息}，获取失败的资产不包含在内
+        """
+        assets = []
+        for address in dict.fromkeys(address.lower() for address in asset_addresses):
+            if address in TOKEN_DECIMALS:
+                assets.append(address)
+            else:
+                logger.error("未找到资产信息 - 地址: %s", address)
+        if not assets:
+            return {}
+        
+        # 使用未过期的缓存，只查询其余资产
+        now = time.time()
+        liquidity = {}
+        missing = []
+        for asset in assets:
+            cached = self._liquidity_cache.get(asset)
+            if cached and cached[0] > now:
+                liquidity[asset] = cached[1]
+            else:
+                missing.append(asset)
+        if not missing:
+            return liquidity
+        
+        fetched = None
+        if await self._is_multicall_available():
+            try:
+                fetched = await self._multicall_liquidity(missing)
+            except Exception as e:
+                logger.warning("Multicall3批量获取流动性失败，改为单独调用: %s", e)
+        
+        if fetched is None:
+            results = await asyncio.gather(
+                *(self.get_asset_liquidity(asset) for asset in missing),
+                return_exceptions=True
+            )
+            fetched = {
+                asset: result for asset, result in zip(missing, results)
+                if result and not isinstance(result, Exception)
             }
+        
+        expires = time.time() + self.config.LIQUIDITY_CACHE_TTL
+        for asset, data in fetched.items():
+            self._liquidity_cache[asset] = (expires, data)
+        liquidity.update(fetched)
+        return liquidity
+
+    async def _multicall_liquidity(self, assets) -> dict:
+        """通过Multicall3获取多个资产（小写地址）的流动性信息"""
+        checksums = [_to_checksum(asset) for asset in assets]
+        
+        # 先一次获取所有未缓存或已过期的储备数据
+        now = time.time()
+        missing = [
+            asset for asset in checksums
+            if not (asset in self._reserve_cache and self._reserve_cache[asset][0] > now)
+        ]
+        if missing:
+            await self._multicall_reserve_data(missing)
+        
+        # 再一次获取所有资产的aToken和债务代币totalSupply
+        token_addresses = [self._token_addresses.get(asset) for asset in checksums]
+        flat_addresses = [address for addresses in token_addresses if addresses for address in addresses]
+        if not flat_addresses:
+            return {}
+        total_supplies = iter(await self._multicall_total_supplies(flat_addresses))
+        
+        liquidity = {}
+        for asset, addresses in zip(assets, token_addresses):
+            if not addresses:
+                continue
+            supplies = (next(total_supplies), next(total_supplies), next(total_supplies))
+            liquidity[asset] = self._build_liquidity(TOKEN_DECIMALS[asset], supplies)
+        return liquidity
+
+    async def _multicall_reserve_data(self, assets):
+        """通过Multicall3一次获取多个资产（校验和地址）的储备数据并缓存代币地址"""
+        calls = [
+            (self._checksum_proxy, True, self._reserve_data_selector + abi_encode(['address'], [asset]))
+            for asset in assets
+        ]
+        results = await self.multicall.functions.aggregate3(calls).call()
+        
+        for asset, (success, return_data) in zip(assets, results):
+            if not success:
+                logger.error("Multicall3获取资产储备数据失败 - 地址: %s", asset)
+                continue
+            (reserve_data,) = abi_decode(self._reserve_data_types, return_data)
+            data = self._reserve_data_to_dict(reserve_data)
+            # eth_abi解码的地址为小写，转换为与合约调用返回值一致的校验和格式
+            for key in ('aTokenAddress', 'stableDebtTokenAddress', 'variableDebtTokenAddress'):
+                data[key] = _to_checksum(data[key])
+            self._store_token_addresses(asset, data)
+
+    async def _get_token_addresses(self, asset_address):
+        """获取资产的AToken、可变利率债务代币和固定利率债务代币地址
+
+        代币地址在同一实现合约下不会变化，因此储备数据按资产缓存，
+        超过RESERVE_CACHE_TTL后重新获取
+        
+        Args:
+            asset_address: 资产合约地址（校验和格式）
             
-        except Exception as e:
-            logger.error(f"获取资产流动性信息失败: {str(e)}")
+        Returns:
+            tuple: (aToken地址, 可变利率债务代币地址, 固定利率债务代币地址)，失败时返回None
+        """
+        now = time.time()
+        cached = self._reserve_cache.get(asset_address)
+        if cached and cached[0] > now:
+            return self._token_addresses[asset_address]
+        
+        # 获取资产的AToken合约地址
+        reserve_data = await self.get_reserve_data(asset_address)
+        if not reserve_data:
+            logger.error("无法获取资产储备数据 - 地址: %s", asset_address)
+            return None
+            
+        return self._store_token_addresses(asset_address, reserve_data)
+
+    def _store_token_addresses(self, asset_address, reserve_data):
+        """从储备数据中提取并缓存代币地址，缺少aToken地址时返回None"""
+        a_token_address = reserve_data.get('aTokenAddress')
+        if not a_token_address:
+            logger.error("无法获取AToken地址 - 资产: %s", asset_address)
             return None
-            
\ No newline at end of file
+            
+        # 获取借款代币合约地址，合约调用返回的地址已是校验和格式，无需再次转换
+        token_addresses = (
+            a_token_address,
+            reserve_data.get('variableDebtTokenAddress') or None,
+            reserve_data.get('stableDebtTokenAddress') or None
+        )
+        self._reserve_cache[asset_address] = (time.time() + self.config.RESERVE_CACHE_TTL, reserve_data)
+        self._token_addresses[asset_address] = token_addresses
+        return token_addresses
+
+    async def _get_total_supplies(self, token_addresses) -> tuple:
+        """获取aToken、可变利率债务代币和固定利率债务代币的totalSupply
+
+        优先通过Multicall3的aggregate3在一次eth_call中获取三个值，
+        链上未部署Multicall3或调用失败时改为并发单独调用
+        
+        Returns:
+            tuple: (存款总额, 可变利率借款总额, 固定利率借款总额)
+        """
+        if await self._is_multicall_available():
+            try:
+                return await self._multicall_total_supplies(token_addresses)
+            except Exception as e:
+                logger.warning("Multicall3调用失败，改为单独调用: %s", e)
+        
+        # 并发单独调用，批量Provider会将这三个eth_call合并为一次HTTP请求
+        results = await asyncio.gather(
+            *(self._total_supply(address) for address in token_addresses),
+            return_exceptions=True
+        )
+        total_supplies = []
+        for address, result in zip(token_addresses, results):
+            if isinstance(result, Exception):
+                logger.error("获取totalSupply失败 - 代币: %s, 错误: %s", address, result)
+                result = 0
+            total_supplies.append(result)
+        return tuple(total_supplies)
+
+    async def _total_supply(self, token_address) -> int:
+        """通过原始eth_call获取代币的totalSupply，地址为空时返回0"""
+        if not token_address:
+            return 0
+        raw = await self.w3.eth.call({'to': token_address, 'data': TOTAL_SUPPLY_SELECTOR})
+        return int.from_bytes(raw, 'big')
+
+    async def _is_multicall_available(self) -> bool:
+        """检查链上是否部署了Multicall3合约，结果只检查一次"""
+        if self._multicall_available is None:
+            try:
+                code = await self.w3.eth.get_code(self.multicall.address)
+            except Exception as e:
+                logger.error("检查Multicall3合约失败: %s", e)
+                return False
+            self._multicall_available = len(code) > 0
+            if not self._multicall_available:
+                logger.warning("链上未部署Multicall3合约，totalSupply改为单独调用")
+        return self._multicall_available
+
+    async def _multicall_total_supplies(self, token_addresses) -> tuple:
+        """通过Multicall3一次获取多个代币的totalSupply，地址为空或调用失败时对应值为0"""
+        calls = [
+            (address, True, TOTAL_SUPPLY_SELECTOR)
+            for address in token_addresses if address
+        ]
+        results = iter(await self.multicall.functions.aggregate3(calls).call())
+        
+        total_supplies = []
+        for address in token_addresses:
+            if not address:
+                total_supplies.append(0)
+                continue
+            success, return_data = next(results)
+            if success and len(return_data) >= 32:
+                total_supplies.append(int.from_bytes(return_data[:32], 'big'))
+            else:
+                logger.error("Multicall3获取totalSupply失败 - 代币: %s", address)
+                total_supplies.append(0)
+        return tuple(total_supplies)
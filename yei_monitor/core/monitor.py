@@ -1,4 +1,5 @@
 import asyncio
+import aiohttp
 from datetime import datetime
 from config.settings import Config
 from core.contract import ContractManager
@@ -9,16 +10,146 @@ from utils.amount_utils import format_amount, format_interest_rate, get_token_na
 
 logger = setup_logger(__name__)
 
+# 各事件中表示金额的参数名
+_AMOUNT_ATTR = {
+    'Supply': 'amount',
+    'Withdraw': 'amount',
+    'Borrow': 'amount',
+    'Repay': 'amount',
+    'LiquidationCall': 'debtToCover',
+    'FlashLoan': 'amount',
+}
+
+# 各事件中表示资产地址的参数名，最后一个为金额对应的资产（清算事件为债务资产）
+_ASSET_ATTR = {
+    'Supply': ('reserve',),
+    'Withdraw': ('reserve',),
+    'Borrow': ('reserve',),
+    'Repay': ('reserve',),
+    'LiquidationCall': ('collateralAsset', 'debtAsset'),
+    'FlashLoan': ('asset',),
+}
+
+# 资金变动事件和高风险事件
+_FUND_EVENTS = frozenset({'Supply', 'Withdraw', 'Borrow', 'Repay', 'LiquidationCall'})
+_HIGH_RISK_EVENTS = frozenset({'LiquidationCall', 'FlashLoan'})
+
+# 事件名称 -> 事件类型信息，首次查询时填充
+_EVENT_TYPE_CACHE = {}
+
+# 事件消息模板，键为(事件名称, 是否为基本解析事件)，None表示其他事件
+_MSG_TEMPLATES = {
+    ("Supply", False): (
+        "📥 存款事件\n"
+        "资产: {asset}\n"
+        "用户: {args.user}\n"
+        "代表: {args.onBehalfOf}\n"
+        "金额: {amount}\n"
+        "{liquidity}\n"
+        "区块: {block}\n"
+        "时间: {ts}"
+    ),
+    ("Withdraw", False): (
+        "📤 提款事件\n"
+        "资产: {asset}\n"
+        "用户: {args.user}\n"
+        "接收: {args.to}\n"
+        "金额: {amount}\n"
+        "{liquidity}\n"
+        "区块: {block}\n"
+        "时间: {ts}"
+    ),
+    ("Borrow", False): (
+        "💰 借款事件\n"
+        "资产: {asset}\n"
+        "用户: {args.user}\n"
+        "代表: {args.onBehalfOf}\n"
+        "金额: {amount}\n"
+        "{liquidity}\n"
+        "利率模式: {args.interestRateMode}\n"
+        "借款利率: {borrow_rate}\n"
+        "区块: {block}\n"
+        "时间: {ts}"
+    ),
+    ("Repay", False): (
+        "💸 还款事件\n"
+        "资产: {asset}\n"
+        "用户: {args.user}\n"
+        "还款人: {args.repayer}\n"
+        "金额: {amount}\n"
+        "{liquidity}\n"
+        "使用AToken: {args.useATokens}\n"
+        "区块: {block}\n"
+        "时间: {ts}"
+    ),
+    ("LiquidationCall", False): (
+        "⚠️ 清算事件\n"
+        "抵押品: {collateral_asset}\n"
+        "债务资产: {asset}\n"
+        "用户: {args.user}\n"
+        "清算金额: {amount}\n"
+        "清算抵押品数量: {collateral_amount}\n"
+        "清算人: {args.liquidator}\n"
+        "抵押品资产状态:\n{collateral_liquidity}\n"
+        "债务资产状态:\n{liquidity}\n"
+        "区块: {block}\n"
+        "时间: {ts}"
+    ),
+    ("FlashLoan", False): (
+        "⚡ 闪电贷事件\n"
+        "目标: {args.target}\n"
+        "发起人: {args.initiator}\n"
+        "资产: {asset}\n"
+        "金额: {amount}\n"
+        "{liquidity}\n"
+        "区块: {block}\n"
+        "时间: {ts}"
+    ),
+    (None, False): (
+        "📝 其他事件: {event_name}\n"
+        "区块: {block}\n"
+        "时间: {ts}\n"
+        "详情: {args}"
+    ),
+    (None, True): (
+        "📝 {event_name} (基本信息)\n"
+        "区块: {block}\n"
+        "交易: {tx}\n"
+        "时间: {ts}"
+    ),
+}
+
+# 基本解析事件只包含区块和交易信息，各事件仅标题不同
+_MSG_TEMPLATES.update({
+    (event_name, True): title + " (基本信息)\n区块: {block}\n交易: {tx}\n时间: {ts}"
+    for event_name, title in (
+        ("Supply", "📥 存款事件"),
+        ("Withdraw", "📤 提款事件"),
+        ("Borrow", "💰 借款事件"),
+        ("Repay", "💸 还款事件"),
+        ("LiquidationCall", "⚠️ 清算事件"),
+        ("FlashLoan", "⚡ 闪电贷事件"),
+    )
+})
+
 class YEIMonitor:
-    def __init__(self):
+    def __init__(self, alert_manager: AlertManager = None):
+        """
+        Args:
+            alert_manager: 与心跳监控共用的AlertManager，未提供时创建并负责关闭自己的实例
+        """
         self.config = Config()
-        self.state = ContractState()
+        self.state = ContractState(checkpoint_path=self.config.CURSOR_PATH)
         self.contract_manager = ContractManager(self.config)
-        self.alert_manager = AlertManager(
+        self._owns_alert_manager = alert_manager is None
+        self.alert_manager = alert_manager or AlertManager(
             self.config.BARK_KEY,
             self.config.BARK_SERVER
         )
-        self.last_checked_block = 0
+        # 最新区块号队列，由区块生产者写入，事件处理协程读取；只保留最新的一个
+        self._new_block: asyncio.Queue = asyncio.Queue(maxsize=1)
+        # 定期检查的触发信号
+        self._check_ticker = asyncio.Event()
 
     async def initialize(self) -> bool:
         """初始化监控系统"""
@@ -34,14 +165,17 @@ class YEIMonitor:
             # 获取初始状态
             self.state.current_implementation = await self.contract_manager.get_implementation_address()
             
-            # 获取当前区块号作为起始监控点
-            self.last_checked_block = await self.contract_manager.w3.eth.block_number
+            # 从检查点恢复起始监控点，没有检查点时使用START_BLOCK，未配置时使用当前区块号
+            if not self.state.load_checkpoint():
+                self.state.last_checked_block = self.config.START_BLOCK
+            if not self.state.last_checked_block:
+                self.state.last_checked_block = await self.contract_manager.w3.eth.block_number
 
-            logger.info(f"初始状态: 代理合约地址={self.state.current_implementation}, 开始监控区块: {self.last_checked_block}")
+            logger.info("初始状态: 代理合约地址=%s, 开始监控区块: %s", self.state.current_implementation, self.state.last_checked_block)
             
             return True
         except Exception as e:
-            logger.error(f"初始化失败: {str(e)}")
+            logger.error("初始化失败: %s", e)
             await self.alert_manager.send_alert("监控系统初始化失败", {"error": str(e)})
             return False
 
@@ -49,40 +183,154 @@ class YEIMonitor:
         """监控合约事件
         
         在可升级代理模式中，我们监控代理合约地址发出的事件，
-        但使用实现合约的ABI来解析这些事件
+        但使用实现合约的ABI来解析这些事件。
+        配置了WS_URL时通过eth_subscribe接收推送，否则轮询新区块
+        """
+        try:
+            logger.info("开始监控合约事件，从区块 %s 开始", self.state.last_checked_block)
+            if self.config.WS_URL:
+                await self._subscribe_events()
+            else:
+                await self._poll_events()
+                    
+        except Exception as e:
+            logger.error("合约事件监控错误: %s", e)
+            await self.alert_manager.send_alert("合约事件监控发生错误", {"error": str(e)})
+
+    async def _catch_up(self, current_block: int = None):
+        """获取并处理从上次检查的区块到当前区块之间的所有事件
+        
+        按LOG_CHUNK_BLOCKS个区块为一个窗口依次处理，每个窗口处理完成后推进last_checked_block，
+        长时间离线后追赶时中途出错也能从已完成的窗口继续。
+        节点返回错误或超时时将窗口减半，并按指数退避重试；之后每个窗口成功后加倍，恢复到LOG_CHUNK_BLOCKS
         """
+        # 获取当前区块
+        if current_block is None:
+            current_block = await self.contract_manager.w3.eth.block_number
+        
+        window = self.config.LOG_CHUNK_BLOCKS
+        retries = 0
+        # 如果有新区块，检查事件
+        while self.state.last_checked_block < current_block:
+            from_block = self.state.last_checked_block + 1
+            to_block = min(from_block + window - 1, current_block)
+            try:
+                # 获取这个窗口内的所有事件
+                events = await self.contract_manager.get_all_events(from_block, to_block)
+            except (ValueError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                retries += 1
+                if retries > self.config.MAX_RETRIES:
+                    raise
+                window = max(self.config.LOG_CHUNK_MIN, window // 2)
+                delay = 2 ** retries
+                logger.warning("获取区块 %s - %s 的事件失败，%s秒后以窗口大小 %s 重试: %s", from_block, to_block, delay, window, e)
+                await asyncio.sleep(delay)
+                continue
+            
+            retries = 0
+            window = min(self.config.LOG_CHUNK_BLOCKS, window * 2)
+            # 一次批量获取这个窗口内所有事件涉及的资产流动性，处理各事件时直接命中缓存
+            await self._prefetch_liquidity(events)
+            
+            # 处理事件，跳过重连前已通过订阅处理过的日志
+            for event in events:
+                if self._is_handled(event):
+                    continue
+                await self.handle_implementation_event(event)
+                self._mark_handled(event)
+            
+            # 更新最后检查的区块，检查点文件最多每CURSOR_PERSIST_INTERVAL秒写入一次
+            self.state.last_checked_block = to_block
+            await self.state.persist(self.config.CURSOR_PERSIST_INTERVAL)
+
+    async def _prefetch_liquidity(self, events):
+        """预先获取一批事件涉及的所有资产（去重后）的流动性数据"""
+        addresses = {}
+        for event in events:
+            if getattr(event, 'args', None):
+                addresses.update(dict.fromkeys(self._get_asset_addresses(event)))
+        if not addresses:
+            return
+        try:
+            await self.contract_manager.get_asset_liquidity_batch(list(addresses))
+        except Exception as e:
+            # 预取失败不影响事件处理，处理时会重新获取
+            logger.warning("预取资产流动性数据失败: %s", e)
+
+    async def _produce_blocks(self):
+        """每15秒查询一次最新区块，有新区块时放入队列"""
+        latest_block = self.state.last_checked_block
+        while True:
+            try:
+                current_block = await self.contract_manager.w3.eth.block_number
+                if current_block > latest_block:
+                    latest_block = current_block
+                    # 事件处理协程还没取走的旧区块号直接替换为最新区块号
+                    if self._new_block.full():
+                        self._new_block.get_nowait()
+                    self._new_block.put_nowait(current_block)
+                
+                # 等待15秒再检查
+                await asyncio.sleep(15)
+                
+            except Exception as e:
+                logger.error("获取最新区块错误: %s", e)
+                await asyncio.sleep(30)  # 出错后等待较长时间再重试
+
+    async def _poll_events(self):
+        """处理区块生产者发现的新区块中的事件"""
+        producer = asyncio.create_task(self._produce_blocks())
         try:
-            logger.info(f"开始监控合约事件，从区块 {self.last_checked_block} 开始")
             while True:
+                current_block = await self._new_block.get()
                 try:
-                    # 获取当前区块
-                    current_block = await self.contract_manager.w3.eth.block_number
-                    
-                    # 如果有新区块，检查事件
-                    if current_block > self.last_checked_block:
-                        # 获取这段时间内的所有事件
-                        events = await self.contract_manager.get_all_events(
-                            self.last_checked_block + 1, 
-                            current_block
-                        )
-                        
-                        # 处理事件
-                        for event in events:
-                            await self.handle_implementation_event(event)
-                        
-                        # 更新最后检查的区块
-                        self.last_checked_block = current_block
-                    
-                    # 等待15秒再检查
-                    await asyncio.sleep(15)
-                    
+                    await self._catch_up(current_block)
                 except Exception as e:
-                    logger.error(f"区块事件检查错误: {str(e)}")
+                    logger.error("区块事件检查错误: %s", e)
+                    # 下次有新区块时会从last_checked_block继续
                     await asyncio.sleep(30)  # 出错后等待较长时间再重试
-                    
-        except Exception as e:
-            logger.error(f"合约事件监控错误: {str(e)}")
-            await self.alert_manager.send_alert("合约事件监控发生错误", {"error": str(e)})
+        finally:
+            producer.cancel()
+
+    async def _subscribe_events(self):
+        """通过WebSocket订阅接收事件，断开后按指数退避重连
+        
+        每次订阅建立后先补齐断线期间的区块，之后推送的事件中
+        位置不晚于已处理的最后一条日志的视为已处理并跳过；
+        收到更晚区块的日志时，之前的区块已推送完毕，推进last_checked_block
+        """
+        delay = self.config.WS_RECONNECT_MIN
+        while True:
+            try:
+                async for event in self.contract_manager.subscribe_logs(on_subscribed=self._catch_up):
+                    delay = self.config.WS_RECONNECT_MIN
+                    if self._is_handled(event):
+                        continue
+                    # 同一区块可能还有后续事件，只记录之前的区块已处理完成
+                    self.state.last_checked_block = max(self.state.last_checked_block, event.blockNumber - 1)
+                    await self.handle_implementation_event(event)
+                    self._mark_handled(event)
+                    await self.state.persist(self.config.CURSOR_PERSIST_INTERVAL)
+                logger.warning("WebSocket订阅已结束")
+            except Exception as e:
+                logger.error("WebSocket订阅错误: %s，%.0f秒后重连", e, delay)
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.config.WS_RECONNECT_MAX)
+
+    def _is_handled(self, event) -> bool:
+        """事件所在区块已处理完成，或位置不晚于已处理的最后一条日志时返回True"""
+        block_number = event.blockNumber
+        if block_number <= self.state.last_checked_block:
+            return True
+        log_index = getattr(event, 'logIndex', None)
+        return log_index is not None and (block_number, log_index) <= self.state.last_event
+
+    def _mark_handled(self, event):
+        """记录已处理的最后一条日志的位置"""
+        log_index = getattr(event, 'logIndex', None)
+        if log_index is not None:
+            self.state.last_event = (event.blockNumber, log_index)
 
     def _get_event_type(self, event_name: str) -> dict:
         """获取事件类型信息
@@ -93,60 +341,98 @@ class YEIMonitor:
         Returns:
             dict: 包含事件类型信息的字典
         """
-        return {
-            'is_fund_event': event_name in ['Supply', 'Withdraw', 'Borrow', 'Repay', 'LiquidationCall'],
-            'is_high_risk_event': event_name in ['LiquidationCall', 'FlashLoan']
-        }
+        event_types = _EVENT_TYPE_CACHE.get(event_name)
+        if event_types is None:
+            event_types = _EVENT_TYPE_CACHE[event_name] = {
+                'is_fund_event': event_name in _FUND_EVENTS,
+                'is_high_risk_event': event_name in _HIGH_RISK_EVENTS
+            }
+        return event_types
     
-    async def _get_asset_addresses(self, event) -> list:
+    def _get_asset_addresses(self, event) -> list:
         """从事件中获取需要查询的资产地址列表
         
+        地址在这里统一转换为小写，处理事件时只转换一次，
+        之后查询代币信息和流动性数据都直接使用小写地址
+        
         Args:
             event: 事件对象
             
         Returns:
-            list: 资产地址列表
+            list: 资产小写地址列表，最后一个为金额对应的资产
         """
-        addresses = []
-        if hasattr(event.args, 'reserve'):
-            addresses.append(event.args.reserve)
-        elif hasattr(event.args, 'asset'):
-            addresses.append(event.args.asset)
-        elif hasattr(event.args, 'collateralAsset') and hasattr(event.args, 'debtAsset'):
-            addresses.extend([event.args.collateralAsset, event.args.debtAsset])
-        return addresses
-
-    async def _get_asset_liquidity_data(self, event) -> dict:
-        """获取事件相关的资产流动性数据
+        addresses = [getattr(event.args, name, None) for name in _ASSET_ATTR.get(event.event, ())]
+        return [address.lower() for address in addresses if address]
+
+    def _get_event_amount(self, event, asset_addresses) -> tuple:
+        """从事件中获取金额及其对应的资产地址
         
         Args:
             event: 事件对象
+            asset_addresses: _get_asset_addresses返回的资产小写地址列表
+        
+        Returns:
+            tuple: (事件金额, 资产小写地址)，无法获取时为(0, None)
+        """
+        amount_attr = _AMOUNT_ATTR.get(event.event)
+        if not amount_attr or not asset_addresses:
+            return 0, None
+        return getattr(event.args, amount_attr, 0), asset_addresses[-1]
+
+    def _classify_importance(self, event_amount, asset_address) -> tuple:
+        """根据事件金额是否超过资产的limit阈值判断通知的重要程度
+        
+        Args:
+            event_amount: 事件金额
+            asset_address: 金额对应的资产小写地址
+            
+        Returns:
+            tuple: (是否为重要通知, 语音通知参数)
+        """
+        # 如果有资产地址和事件金额，检查是否超过limit
+        if asset_address and event_amount > 0:
+            token_info = TOKEN_DECIMALS.get(asset_address)
+            
+            if token_info and token_info.limit is not None:
+                # 将事件金额转换为实际金额（考虑代币精度）
+                actual_amount = event_amount / token_info.divisor
+                limit = token_info.limit
+                
+                # 判断是否超过limit
+                if actual_amount >= limit:
+                    logger.info("事件金额 %s %s 超过阈值 %s，发送重要通知", actual_amount, token_info.symbol, limit)
+                    return True, "1"  # 进行语音通知
+                logger.debug("事件金额 %s %s 未超过阈值 %s，发送普通通知", actual_amount, token_info.symbol, limit)
+        
+        return False, "0"  # 默认不进行语音通知
+
+    async def _get_asset_liquidity_data(self, asset_addresses) -> dict:
+        """获取事件相关的资产流动性数据
+        
+        Args:
+            asset_addresses: 事件相关的资产小写地址列表
             
         Returns:
             dict: 资产流动性数据字典 {asset_address: liquidity_data}
         """
         asset_liquidity_data = {}
         try:
-            addresses = await self._get_asset_addresses(event)
-            for address in addresses:
-                try:
-                    liquidity_data = await self.contract_manager.get_asset_liquidity(address)
-                    if liquidity_data:
-                        asset_liquidity_data[address.lower()] = liquidity_data
-                    else:
-                        logger.warning(f"获取资产 {address} 的流动性数据为空")
-                except Exception as e:
-                    logger.error(f"获取资产 {address} 的流动性数据失败: {str(e)}")
+            # 事件涉及的所有资产（清算事件为两个）在一次批量调用中获取
+            asset_liquidity_data = await self.contract_manager.get_asset_liquidity_batch(asset_addresses)
+            for address in asset_addresses:
+                if address not in asset_liquidity_data:
+                    logger.warning("获取资产 %s 的流动性数据为空", address)
         except Exception as e:
-            logger.error(f"处理资产地址失败: {str(e)}")
+            logger.error("获取资产流动性数据失败: %s", e)
         return asset_liquidity_data
 
-    async def _should_send_notification(self, event_name: str, event=None) -> tuple:
+    def _should_send_notification(self, event_name: str, event_amount=0, asset_address=None) -> tuple:
         """判断是否需要发送通知
         
         Args:
             event_name: 事件名称
-            event: 事件对象（可选）
+            event_amount: 事件金额（清算事件为债务金额）
+            asset_address: 金额对应的资产小写地址
             
         Returns:
             tuple: (是否发送通知, 通知原因)
@@ -159,23 +445,19 @@ class YEIMonitor:
         reason = "高风险事件" if event_types['is_high_risk_event'] else "根据配置发送所有事件"
         
         # 对 LiquidationCall 事件进行特殊处理
-        if event_name == "LiquidationCall" and event and hasattr(event.args, 'debtToCover') and hasattr(event.args, 'debtAsset'):
-            debt_asset = event.args.debtAsset.lower()
-            debt_to_cover = event.args.debtToCover
-            
+        if event_name == "LiquidationCall" and asset_address:
             # 获取代币信息
-            token_info = TOKEN_DECIMALS.get(debt_asset)
-            if token_info and "liquidation_limit" in token_info and "decimals" in token_info:
+            token_info = TOKEN_DECIMALS.get(asset_address)
+            if token_info and token_info.liquidation_limit is not None:
                 # 将清算金额转换为实际金额（考虑代币精度）
-                decimals = token_info["decimals"]
-                actual_amount = debt_to_cover / (10 ** decimals)
-                liquidation_limit = token_info["liquidation_limit"]
+                actual_amount = event_amount / token_info.divisor
+                liquidation_limit = token_info.liquidation_limit
                 
                 # 如果清算金额小于 liquidation_limit，不发送通知
                 if actual_amount < liquidation_limit:
                     need_notification = False
-                    reason = f"清算金额 {actual_amount} {token_info['symbol']} 小于阈值 {liquidation_limit}"
-                    logger.info(f"LiquidationCall 事件不发送通知: {reason}")
+                    reason = f"清算金额 {actual_amount} {token_info.symbol} 小于阈值 {liquidation_limit}"
+                    logger.info("LiquidationCall 事件不发送通知: %s", reason)
         
         return need_notification, reason
 
@@ -187,74 +469,42 @@ class YEIMonitor:
             
             # 检查是否为基本解析的事件
             is_basic_event = not hasattr(event, 'args') or not event.args
-            logger.info(f"处理事件: {event_name}, 是否为基本解析事件: {is_basic_event}")
+            logger.info("处理事件: %s, 是否为基本解析事件: %s", event_name, is_basic_event)
             
             # 获取事件类型信息
             event_types = self._get_event_type(event_name)
             
-            # 获取资产流动性数据
+            # 资产地址只在这里转换一次小写
+            asset_addresses = [] if is_basic_event else self._get_asset_addresses(event)
+            event_amount, amount_asset = self._get_event_amount(event, asset_addresses)
+            
+            # 是否发送通知
+            need_notification, reason = self._should_send_notification(event_name, event_amount, amount_asset)
+            
+            # 获取资产流动性数据；带资产地址的事件都是资金变动事件或高风险事件，流动性数据总会被用到
             asset_liquidity_data = {}
-            if not is_basic_event:
-                asset_liquidity_data = await self._get_asset_liquidity_data(event)
+            if asset_addresses:
+                asset_liquidity_data = await self._get_asset_liquidity_data(asset_addresses)
                 if not asset_liquidity_data:
-                    logger.warning(f"未能获取到任何资产流动性数据: {event_name}")
+                    logger.warning("未能获取到任何资产流动性数据: %s", event_name)
             
             try:
                 # 构建事件消息
-                message = self._build_event_message(event, is_basic_event, timestamp, asset_liquidity_data)
+                message = self._build_event_message(event, is_basic_event, timestamp, asset_addresses, asset_liquidity_data)
                 
                 # 记录事件到日志
-                logger.info(f"检测到事件: {event_name}")
-                logger.info(f"事件详情: {message}")
+                logger.debug("事件详情: %s", message)
+                
+                # 判断事件金额是否超过limit阈值，事件通知和流动性警报共用同一结果
+                is_important, call_value = self._classify_importance(event_amount, amount_asset)
                 
                 # 检查流动性状况（仅针对资金变动事件）
                 if event_types['is_fund_event'] and not is_basic_event and asset_liquidity_data:
-                    await self.check_liquidity(event, message, asset_liquidity_data)
+                    await self.check_liquidity(event, message, asset_addresses, asset_liquidity_data, (is_important, call_value))
                 
                 # 发送通知
-                need_notification, reason = await self._should_send_notification(event_name, event)
                 if need_notification:
-                    logger.info(f"发送通知 ({reason}): {event_name}")
-                    
-                    # 判断事件金额是否超过limit阈值
-                    is_important = False
-                    call_value = "0"  # 默认不进行语音通知
-                    
-                    # 获取事件金额和资产地址
-                    event_amount = 0
-                    asset_address = None
-                    
-                    if hasattr(event.args, 'amount'):
-                        event_amount = event.args.amount
-                    elif hasattr(event.args, 'debtToCover'):
-                        event_amount = event.args.debtToCover
-                    elif hasattr(event.args, 'value'):
-                        event_amount = event.args.value
-                        
-                    if hasattr(event.args, 'reserve'):
-                        asset_address = event.args.reserve
-                    elif hasattr(event.args, 'asset'):
-                        asset_address = event.args.asset
-                    elif hasattr(event.args, 'debtAsset'):
-                        asset_address = event.args.debtAsset
-                    
-                    # 如果有资产地址和事件金额，检查是否超过limit
-                    if asset_address and event_amount > 0:
-                        token_info = TOKEN_DECIMALS.get(asset_address.lower())
-                        
-                        if token_info and "limit" in token_info and "decimals" in token_info:
-                            # 将事件金额转换为实际金额（考虑代币精度）
-                            decimals = token_info["decimals"]
-                            actual_amount = event_amount / (10 ** decimals)
-                            limit = token_info["limit"]
-                            
-                            # 判断是否超过limit
-                            if actual_amount >= limit:
-                                is_important = True
-                                call_value = "1"  # 进行语音通知
-                                logger.info(f"事件金额 {actual_amount} {token_info['symbol']} 超过阈值 {limit}，发送重要通知")
-                            else:
-                                logger.info(f"事件金额 {actual_amount} {token_info['symbol']} 未超过阈值 {limit}，发送普通通知")
+                    logger.info("发送通知 (%s): %s", reason, event_name)
                     
                     # 根据优先级发送不同级别的通知
                     if is_important:
@@ -274,13 +524,14 @@ class YEIMonitor:
             logger.error(error_msg)
             await self.alert_manager.send_alert(f"严重错误\n事件: {event_name}\n错误: {error_msg}", is_high_risk=True)
 
-    def _build_event_message(self, event, is_basic_event, timestamp, asset_liquidity_data):
+    def _build_event_message(self, event, is_basic_event, timestamp, asset_addresses, asset_liquidity_data):
         """构建事件消息
         
         Args:
             event: 事件对象
             is_basic_event: 是否为基本解析事件
             timestamp: 时间戳
+            asset_addresses: 事件相关的资产小写地址列表
             asset_liquidity_data: 资产流动性数据字典 {asset_address: liquidity_data}
         
         Returns:
@@ -290,196 +541,87 @@ class YEIMonitor:
         
         def get_liquidity_info(asset_address):
             """获取资产流动性信息的格式化文本"""
-            liquidity_data = asset_liquidity_data.get(asset_address.lower())
+            liquidity_data = asset_liquidity_data.get(asset_address)
             if liquidity_data:
                 return f"剩余流动性: {format_amount(liquidity_data['availableLiquidity'], asset_address)}\n利用率: {liquidity_data['utilizationRate']:.2f}%"
             return ""
         
-        if event_name == "Supply":
-            if is_basic_event:
-                message = (
-                    f"📥 存款事件 (基本信息)\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"交易: {getattr(event, 'transactionHash', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-            else:
-                asset_name = get_token_name(event.args.reserve)
-                liquidity_info = get_liquidity_info(event.args.reserve)
-                message = (
-                    f"📥 存款事件\n"
-                    f"资产: {asset_name}\n"
-                    f"用户: {event.args.user}\n"
-                    f"代表: {event.args.onBehalfOf}\n"
-                    f"金额: {format_amount(event.args.amount, event.args.reserve)}\n"
-                    f"{liquidity_info}\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-        elif event_name == "Withdraw":
-            if is_basic_event:
-                message = (
-                    f"📤 提款事件 (基本信息)\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"交易: {getattr(event, 'transactionHash', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-            else:
-                asset_name = get_token_name(event.args.reserve)
-                liquidity_info = get_liquidity_info(event.args.reserve)
-                message = (
-                    f"📤 提款事件\n"
-                    f"资产: {asset_name}\n"
-                    f"用户: {event.args.user}\n"
-                    f"接收: {event.args.to}\n"
-                    f"金额: {format_amount(event.args.amount, event.args.reserve)}\n"
-                    f"{liquidity_info}\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-        elif event_name == "Borrow":
-            if is_basic_event:
-                message = (
-                    f"💰 借款事件 (基本信息)\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"交易: {getattr(event, 'transactionHash', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-            else:
-                asset_name = get_token_name(event.args.reserve)
-                liquidity_info = get_liquidity_info(event.args.reserve)
-                message = (
-                    f"💰 借款事件\n"
-                    f"资产: {asset_name}\n"
-                    f"用户: {event.args.user}\n"
-                    f"代表: {event.args.onBehalfOf}\n"
-                    f"金额: {format_amount(event.args.amount, event.args.reserve)}\n"
-                    f"{liquidity_info}\n"
-                    f"利率模式: {event.args.interestRateMode}\n"
-                    f"借款利率: {format_interest_rate(event.args.borrowRate)}\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-        elif event_name == "Repay":
-            if is_basic_event:
-                message = (
-                    f"💸 还款事件 (基本信息)\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"交易: {getattr(event, 'transactionHash', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-            else:
-                asset_name = get_token_name(event.args.reserve)
-                liquidity_info = get_liquidity_info(event.args.reserve)
-                message = (
-                    f"💸 还款事件\n"
-                    f"资产: {asset_name}\n"
-                    f"用户: {event.args.user}\n"
-                    f"还款人: {event.args.repayer}\n"
-                    f"金额: {format_amount(event.args.amount, event.args.reserve)}\n"
-                    f"{liquidity_info}\n"
-                    f"使用AToken: {event.args.useATokens}\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-        elif event_name == "LiquidationCall":
-            if is_basic_event:
-                message = (
-                    f"⚠️ 清算事件 (基本信息)\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"交易: {getattr(event, 'transactionHash', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-            else:
-                collateral_asset_name = get_token_name(event.args.collateralAsset)
-                debt_asset_name = get_token_name(event.args.debtAsset)
-                
-                collateral_liquidity_info = get_liquidity_info(event.args.collateralAsset)
-                debt_liquidity_info = get_liquidity_info(event.args.debtAsset)
-                
-                message = (
-                    f"⚠️ 清算事件\n"
-                    f"抵押品: {collateral_asset_name}\n"
-                    f"债务资产: {debt_asset_name}\n"
-                    f"用户: {event.args.user}\n"
-                    f"清算金额: {format_amount(event.args.debtToCover, event.args.debtAsset)}\n"
-                    f"清算抵押品数量: {format_amount(event.args.liquidatedCollateralAmount, event.args.collateralAsset)}\n"
-                    f"清算人: {event.args.liquidator}\n"
-                    f"抵押品资产状态:\n{collateral_liquidity_info}\n"
-                    f"债务资产状态:\n{debt_liquidity_info}\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-        elif event_name == "FlashLoan":
-            if is_basic_event:
-                message = (
-                    f"⚡ 闪电贷事件 (基本信息)\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"交易: {getattr(event, 'transactionHash', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-            else:
-                asset_name = get_token_name(event.args.asset)
-                liquidity_info = get_liquidity_info(event.args.asset)
-                message = (
-                    f"⚡ 闪电贷事件\n"
-                    f"目标: {event.args.target}\n"
-                    f"发起人: {event.args.initiator}\n"
-                    f"资产: {asset_name}\n"
-                    f"金额: {format_amount(event.args.amount, event.args.asset)}\n"
-                    f"{liquidity_info}\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-        else:
-            # 对于未知事件或其他事件
-            if is_basic_event:
-                message = (
-                    f"📝 {event_name} (基本信息)\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"交易: {getattr(event, 'transactionHash', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-            else:
-                message = (
-                    f"📝 其他事件: {event_name}\n"
-                    f"区块: {getattr(event, 'blockNumber', '未知')}\n"
-                    f"时间: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                    f"详情: {event.args}"
-                )
-                
-        return message
+        # 未知事件或其他事件使用通用模板
+        template = _MSG_TEMPLATES.get((event_name, is_basic_event))
+        if template is None:
+            template = _MSG_TEMPLATES[(None, is_basic_event)]
+        
+        ctx = {
+            "event_name": event_name,
+            "args": getattr(event, 'args', None),
+            "block": getattr(event, 'blockNumber', '未知'),
+            "tx": getattr(event, 'transactionHash', '未知'),
+            "ts": timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        
+        if not is_basic_event and event_name in _ASSET_ATTR:
+            args = event.args
+            # 金额对应的资产（清算事件为债务资产）
+            asset_address = asset_addresses[-1]
+            ctx["asset"] = get_token_name(asset_address)
+            ctx["amount"] = format_amount(getattr(args, _AMOUNT_ATTR[event_name]), asset_address)
+            ctx["liquidity"] = get_liquidity_info(asset_address)
+            
+            if event_name == "LiquidationCall":
+                collateral_asset = asset_addresses[0]
+                ctx["collateral_asset"] = get_token_name(collateral_asset)
+                ctx["collateral_amount"] = format_amount(args.liquidatedCollateralAmount, collateral_asset)
+                ctx["collateral_liquidity"] = get_liquidity_info(collateral_asset)
+            elif event_name == "Borrow":
+                ctx["borrow_rate"] = format_interest_rate(args.borrowRate)
+        
+        return template.format_map(ctx)
 
-    async def check_liquidity(self, event, event_message, liquidity_cache):
-        """检查流动性状况"""
+    async def check_liquidity(self, event, event_message, asset_addresses, liquidity_cache, importance):
+        """检查流动性状况
+        
+        Args:
+            event: 事件对象
+            event_message: 事件消息文本
+            asset_addresses: 事件相关的资产小写地址列表
+            liquidity_cache: 处理事件时已获取的资产流动性数据 {asset_address: liquidity_data}
+            importance: _classify_importance的结果 (是否为重要通知, 语音通知参数)
+        """
         try:
-            # 获取事件相关的资产地址
-            asset_addresses = await self._get_asset_addresses(event)
             if not asset_addresses:
-                logger.warning(f"无法获取事件相关的资产地址: {event.event}")
+                logger.warning("无法获取事件相关的资产地址: %s", event.event)
                 return
             
+            # 处理事件时未能获取到的资产，一次并发补充获取
+            missing = [address for address in asset_addresses if address not in liquidity_cache]
+            if missing:
+                liquidity_cache = {
+                    **liquidity_cache,
+                    **await self.contract_manager.get_asset_liquidity_batch(missing)
+                }
+            
             # 获取事件名称和金额
             event_name = event.event
             
             # 获取事件金额
-            event_amount = 0
-            if hasattr(event.args, 'amount'):
-                event_amount = event.args.amount
-            elif hasattr(event.args, 'debtToCover'):
-                event_amount = event.args.debtToCover
-            elif hasattr(event.args, 'value'):
-                event_amount = event.args.value
+            event_amount, _ = self._get_event_amount(event, asset_addresses)
+            
+            # 所有资产的通知使用事件的重要程度
+            is_important, call_value = importance
+            
+            # 同一事件触发的所有警报合并为一条通知发送
+            alerts = []
+            now_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
             # 遍历所有相关资产
             for asset_address in asset_addresses:
                 # 获取资产信息
                 asset_symbol = get_token_name(asset_address)
                 
-                # 获取当前流动性数据
-                current_liquidity_data = await self.contract_manager.get_asset_liquidity(asset_address)
+                # 使用已获取的流动性数据，不再逐个资产查询
+                current_liquidity_data = liquidity_cache.get(asset_address)
                 if not current_liquidity_data:
-                    logger.warning(f"无法获取资产 {asset_symbol} 的流动性数据")
+                    logger.warning("无法获取资产 %s 的流动性数据", asset_symbol)
                     continue
                 
                 # 获取当前利用率
@@ -506,46 +648,21 @@ class YEIMonitor:
                     impact_direction = "变化"
                     impact_sign = "±"
                 
-                logger.info(f"事件'{event_name}'导致{asset_symbol}流动性{impact_direction}{event_impact_percentage:.8f}%")
+                logger.debug("事件'%s'导致%s流动性%s%.8f%%", event_name, asset_symbol, impact_direction, event_impact_percentage)
                 
                 # 标记是否触发了流动性异常波动阈值
                 liquidity_change_triggered = event_impact_percentage >= self.config.LIQUIDITY_CHANGE_THRESHOLD
                 
                 # 如果流动性变化超过阈值，发送通知
                 if liquidity_change_triggered:
-                    # 判断事件金额是否超过limit阈值
-                    is_important = False
-                    call_value = "0"  # 默认不进行语音通知
-                    
-                    # 检查是否超过limit
-                    if asset_address and event_amount > 0:
-                        token_info = TOKEN_DECIMALS.get(asset_address.lower())
-                        
-                        if token_info and "limit" in token_info and "decimals" in token_info:
-                            # 将事件金额转换为实际金额（考虑代币精度）
-                            decimals = token_info["decimals"]
-                            actual_amount = event_amount / (10 ** decimals)
-                            limit = token_info["limit"]
-                            
-                            # 判断是否超过limit
-                            if actual_amount >= limit:
-                                is_important = True
-                                call_value = "1"  # 进行语音通知
-                                logger.info(f"流动性检查: 事件金额 {actual_amount} {token_info['symbol']} 超过阈值 {limit}，发送重要通知")
-                            else:
-                                logger.info(f"流动性检查: 事件金额 {actual_amount} {token_info['symbol']} 未超过阈值 {limit}，发送普通通知")
-                    
-                    await self.alert_manager.send_alert(
+                    alerts.append(
                         f"⚠️ {asset_symbol}资产流动性{impact_direction}超过阈值\n"
                         f"当前利用率: {current_utilization:.2f}%\n"
                         f"变化幅度: {impact_sign}{event_impact_percentage:.2f}%\n"
                         f"事件类型: {event_name}\n"
-                        f"时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                        f"\n--- 触发事件 ---\n{event_message}",
-                        is_high_risk=is_important,
-                        call_value=call_value
+                        f"时间: {now_str}"
                     )
-                    logger.warning(f"{asset_symbol}资产流动性{impact_direction}超过阈值: {impact_sign}{event_impact_percentage:.2f}%, 当前利用率: {current_utilization:.2f}%")
+                    logger.warning("%s资产流动性%s超过阈值: %s%.2f%%, 当前利用率: %.2f%%", asset_symbol, impact_direction, impact_sign, event_impact_percentage, current_utilization)
             
                     # 只有在流动性异常波动阈值被触发后才检测资金池利用率
                     if current_utilization >= self.config.ASSET_UTILIZATION_WARNING_THRESHOLD:
@@ -557,52 +674,71 @@ class YEIMonitor:
                         if event_impact_percentage > 0:
                             event_impact_info = f"本次事件流动性影响: {impact_sign}{event_impact_percentage:.2f}%\n"
                         
-                        await self.alert_manager.send_alert(
+                        alerts.append(
                             f"⚠️ {asset_symbol}资金利用率超过阈值\n"
                             f"当前利用率: {current_utilization:.2f}%\n"
                             f"警戒线: {self.config.ASSET_UTILIZATION_WARNING_THRESHOLD:.2f}%\n"
                             f"当前流动性: {liquidity_percentage:.2f}%\n"
                             f"{event_impact_info}"
-                            f"时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                            f"\n--- 触发事件 ---\n{event_message}",
-                            is_high_risk=is_important,
-                            call_value=call_value
+                            f"时间: {now_str}"
                         )
-                        logger.warning(f"{asset_symbol}资产利用率达到警戒线: {current_utilization:.2f}%, 剩余流动性: {liquidity_percentage:.2f}%")
+                        logger.warning("%s资产利用率达到警戒线: %.2f%%, 剩余流动性: %.2f%%", asset_symbol, current_utilization, liquidity_percentage)
                 else:
                     # 如果没有触发流动性异常波动阈值，记录日志但不检查利用率
-                    logger.info(f"{asset_symbol}流动性变化未超过阈值({event_impact_percentage:.2f}% < {self.config.LIQUIDITY_CHANGE_THRESHOLD:.2f}%)，跳过利用率检查")
+                    logger.debug("%s流动性变化未超过阈值(%.2f%% < %.2f%%)，跳过利用率检查", asset_symbol, event_impact_percentage, self.config.LIQUIDITY_CHANGE_THRESHOLD)
+            
+                logger.debug("资产流动性检查完成 - %s利用率: %.2f%%", asset_symbol, current_utilization)
             
-                logger.info(f"资产流动性检查完成 - {asset_symbol}利用率: {current_utilization:.2f}%")
+            if alerts:
+                await self.alert_manager.send_alert(
+                    "\n---\n".join(alerts) + f"\n\n--- 触发事件 ---\n{event_message}",
+                    is_high_risk=is_important,
+                    call_value=call_value
+                )
             
         except Exception as e:
-            logger.error(f"检查流动性状况失败: {str(e)}")
+            logger.error("检查流动性状况失败: %s", e)
 
     async def check_contract_state(self):
         """检查合约状态"""
         try:
+            # 本次检查使用同一个时间
+            now = datetime.now()
+            now_ts = int(now.timestamp())
+            
             # 检查代理合约地址
             current_implementation = await self.contract_manager.get_implementation_address()
-            if self.state.update_implementation(current_implementation) and not self.state.is_first_run:
+            if self.state.update_implementation(current_implementation, now_ts) and not self.state.is_first_run:
                 await self.alert_manager.send_alert(
                     f"⚠️ 代理合约地址变更确认\n"
                     f"原地址: {self.state.current_implementation}\n"
                     f"新地址: {current_implementation}\n"
-                    f"时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                    f"时间: {now.strftime('%Y-%m-%d %H:%M:%S')}"
                 )
 
             self.state.is_first_run = False
-            self.state.last_check_time = int(datetime.now().timestamp())
+            self.state.last_check_time = now_ts
 
         except Exception as e:
-            logger.error(f"状态检查错误: {str(e)}")
+            logger.error("状态检查错误: %s", e)
             await self.alert_manager.send_alert("状态检查失败", {"error": str(e)})
 
-    async def periodic_check(self):
-        """定期检查"""
+    async def _tick_checks(self):
+        """每隔CHECK_INTERVAL触发一次定期检查"""
         while True:
-            await self.check_contract_state()
             await asyncio.sleep(self.config.CHECK_INTERVAL)
+            self._check_ticker.set()
+
+    async def periodic_check(self):
+        """定期检查，启动时检查一次，之后每次收到触发信号时检查"""
+        ticker = asyncio.create_task(self._tick_checks())
+        try:
+            while True:
+                await self.check_contract_state()
+                await self._check_ticker.wait()
+                self._check_ticker.clear()
+        finally:
+            ticker.cancel()
 
     async def run(self):
         """运行监控系统"""
@@ -617,5 +753,11 @@ class YEIMonitor:
             ]
             await asyncio.gather(*tasks)
         except Exception as e:
-            logger.error(f"监控系统运行错误: {str(e)}")
-            await self.alert_manager.send_alert("监控系统发生错误", {"error": str(e)}) 
\ No newline at end of file
+            logger.error("监控系统运行错误: %s", e)
+            await self.alert_manager.send_alert("监控系统发生错误", {"error": str(e)})
+        finally:
+            # 退出前写入最新的检查点
+            await self.state.persist()
+            await self.contract_manager.close()
+            if self._owns_alert_manager:
+                await self.alert_manager.close() 
\ No newline at end of file
@@ -0,0 +1,229 @@
+import asyncio
+from collections.abc import Mapping
+from typing import Any, AsyncIterator, List, Optional, Set, Tuple
+import aiohttp
+import ijson
+import orjson
+from eth_utils import to_hex
+from web3 import AsyncHTTPProvider
+from web3.types import RPCEndpoint, RPCResponse
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def _json_default(obj):
+    """orjson无法直接序列化的类型：字节转为十六进制字符串，AttributeDict转为dict"""
+    if isinstance(obj, (bytes, bytearray)):
+        return to_hex(obj)
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+def encode_json(obj: Any) -> bytes:
+    """使用orjson编码RPC请求"""
+    return orjson.dumps(obj, default=_json_default)
+
+class BatchingHTTPProvider(AsyncHTTPProvider):
+    """支持JSON-RPC批量请求的异步HTTP Provider
+
+    在同一时间窗口内并发发起的RPC请求会被合并为一个JSON数组POST，
+    收到响应后按id拆分，分别返回给各自的调用方；节点不支持批量请求时逐个发送。
+    请求和响应使用orjson编解码，加快大体积eth_getLogs响应的解析；
+    区块范围很大的eth_getLogs可通过stream_logs流式解析。
+    所有请求复用同一个aiohttp会话及其keep-alive连接池，避免每次请求重新建立TCP/TLS连接
+    """
+
+    def __init__(self, endpoint_uri: str, batch_window: float = 0.0, max_batch_size: int = 100,
+                 request_kwargs: Optional[Any] = None):
+        super().__init__(endpoint_uri, request_kwargs)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.Handle] = None
+        # 保存正在发送的批量任务，避免任务对象被提前回收
+        self._sending: Set[asyncio.Task] = set()
+        self._session: Optional[aiohttp.ClientSession] = None
+        # 节点拒绝批量请求后置为False，之后的请求都单独发送
+        self._batch_supported = True
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的HTTP会话，首次使用时创建"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=64,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=75
+                ),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._session
+
+    async def close(self):
+        """关闭共享的HTTP会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _post(self, body: bytes) -> bytes:
+        """通过共享会话发送POST请求，返回原始响应内容"""
+        session = self._get_session()
+        headers = self.get_request_kwargs().get('headers')
+        async with session.post(self.endpoint_uri, data=body, headers=headers) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def stream_logs(self, filter_params: dict) -> AsyncIterator[dict]:
+        """流式获取eth_getLogs的结果
+
+        不经过批量队列单独发送请求，边接收响应边用ijson增量解析，
+        每解析完一条日志立即返回，内存占用与单条日志而非整个响应成正比。
+        返回的日志为节点原始格式（十六进制字符串），由调用方转换
+        
+        Raises:
+            ValueError: 节点返回错误
+        """
+        params = {key: hex(value) if isinstance(value, int) else value
+                  for key, value in filter_params.items()}
+        body = encode_json({
+            "jsonrpc": "2.0",
+            "method": "eth_getLogs",
+            "params": [params],
+            "id": next(self.request_counter),
+        })
+        
+        session = self._get_session()
+        headers = self.get_request_kwargs().get('headers')
+        async with session.post(self.endpoint_uri, data=body, headers=headers) as response:
+            response.raise_for_status()
+            builder = None
+            error = {}
+            async for prefix, event, value in ijson.parse(response.content):
+                if builder is None:
+                    if prefix == 'result.item' and event == 'start_map':
+                        builder = ijson.ObjectBuilder()
+                        builder.event(event, value)
+                    elif prefix in ('error.code', 'error.message'):
+                        error[prefix[len('error.'):]] = value
+                    continue
+                
+                builder.event(event, value)
+                if prefix == 'result.item' and event == 'end_map':
+                    yield builder.value
+                    builder = None
+            
+            if error:
+                raise ValueError(f"eth_getLogs请求失败: {error.get('message')} (code: {error.get('code')})")
+
+    def encode_rpc_request(self, method: RPCEndpoint, params: Any) -> bytes:
+        return encode_json({
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or [],
+            "id": next(self.request_counter),
+        })
+
+    def decode_rpc_response(self, raw_response: bytes) -> RPCResponse:
+        return orjson.loads(raw_response)
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """将请求加入当前批次，等待批量响应中对应的结果"""
+        request = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or [],
+            "id": next(self.request_counter),
+        }
+        # 节点不支持批量请求时直接单独发送
+        if not self._batch_supported:
+            return await self._post_request(request)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+
+        # 批次已满立即发送，否则在时间窗口结束时发送；
+        # 时间窗口为0时只合并同一轮事件循环中并发发起的请求，不增加等待时间
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            if self.batch_window > 0:
+                self._flush_handle = loop.call_later(self.batch_window, self._flush)
+            else:
+                self._flush_handle = loop.call_soon(self._flush)
+
+        return await future
+
+    def _flush(self):
+        """发送当前批次中的所有请求"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._send_batch(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _post_request(self, request: dict) -> RPCResponse:
+        """单独发送一个请求"""
+        return self.decode_rpc_response(await self._post(encode_json(request)))
+
+    async def _resolve(self, request: dict, future: asyncio.Future):
+        """单独发送一个请求，并将结果或异常设置到future"""
+        try:
+            response = await self._post_request(request)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(response)
+
+    async def _send_batch(self, batch: List[Tuple[dict, asyncio.Future]]):
+        """发送批量请求并按id分发响应
+
+        节点拒绝批量请求（HTTP错误、无法解析或返回的不是数组）时改为逐个发送，
+        之后的请求也不再合并；批量响应中缺少结果的请求单独重发
+        """
+        # 只有一个请求时按普通请求发送
+        if len(batch) == 1 or not self._batch_supported:
+            await asyncio.gather(*(self._resolve(request, future) for request, future in batch))
+            return
+
+        logger.debug("发送批量RPC请求，共 %s 个", len(batch))
+        try:
+            decoded = self.decode_rpc_response(await self._post(encode_json([request for request, _ in batch])))
+        except (aiohttp.ClientResponseError, ValueError) as e:
+            decoded = e
+        except Exception as e:
+            logger.error("批量RPC请求失败: %s", e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if isinstance(decoded, list):
+            response_by_id = {
+                response.get("id"): response for response in decoded if isinstance(response, Mapping)
+            }
+            retry = []
+            for request, future in batch:
+                if future.done():
+                    continue
+                response = response_by_id.get(request["id"])
+                if response is None:
+                    retry.append((request, future))
+                else:
+                    future.set_result(response)
+            if retry:
+                logger.warning("批量响应中缺少 %s 个请求的结果，改为单独发送", len(retry))
+        else:
+            self._batch_supported = False
+            retry = batch
+            logger.warning("节点不支持JSON-RPC批量请求，改为逐个发送: %s", decoded)
+
+        await asyncio.gather(*(self._resolve(request, future) for request, future in retry))
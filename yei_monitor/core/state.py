@@ -1,18 +1,94 @@
-from dataclasses import dataclass
-from datetime import datetime
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from utils.logger import setup_logger
 
-@dataclass
+logger = setup_logger(__name__)
+
+@dataclass(slots=True)
 class ContractState:
     """合约状态类"""
     current_implementation: str = None
     last_upgrade_time: int = 0
     is_first_run: bool = True
     last_check_time: int = 0
+    # 已处理完成的最后一个区块，持久化到checkpoint_path，重启后从此处继续
+    last_checked_block: int = 0
+    # 已处理的最后一条日志的(区块号, logIndex)，区块只处理了一部分时用于跳过其中已处理的日志
+    last_event: tuple = (0, -1)
+    checkpoint_path: str = None
+    _last_persist: float = field(default=0.0, repr=False, compare=False)
+    # 保证同一时间只有一次写入，避免两次写入同时使用同一个临时文件
+    _persist_lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False, compare=False)
+
+    def update_implementation(self, new_implementation: str, now_ts: int) -> bool:
+        """更新实现地址
 
-    def update_implementation(self, new_implementation: str) -> bool:
-        """更新实现地址"""
+        Args:
+            new_implementation: 新的实现地址
+            now_ts: 调用方获取的当前时间戳（秒）
+        """
         if self.current_implementation != new_implementation:
             self.current_implementation = new_implementation
-            self.last_upgrade_time = int(datetime.now().timestamp())
+            self.last_upgrade_time = now_ts
             return True
-        return False 
\ No newline at end of file
+        return False
+
+    def load_checkpoint(self) -> int:
+        """从检查点文件恢复last_checked_block和last_event
+
+        检查点文件第一行为last_checked_block，第二行（可选）为last_event的区块号和logIndex
+
+        Returns:
+            int: 检查点文件中记录的区块号，不存在或读取失败时返回0
+        """
+        if not self.checkpoint_path:
+            return 0
+        path = Path(self.checkpoint_path)
+        try:
+            if path.exists():
+                lines = path.read_text().split()
+                self.last_checked_block = int(lines[0])
+                if len(lines) >= 3:
+                    self.last_event = (int(lines[1]), int(lines[2]))
+                return self.last_checked_block
+        except (OSError, ValueError, IndexError) as e:
+            logger.error("读取区块检查点失败: %s", e)
+        return 0
+
+    async def persist(self, min_interval: float = 0) -> bool:
+        """原子地将last_checked_block和last_event写入检查点文件
+
+        文件写入在线程池中执行，不阻塞事件循环
+
+        Args:
+            min_interval: 距上次写入不足该秒数时跳过本次写入，0表示立即写入
+
+        Returns:
+            bool: 是否写入了检查点文件
+        """
+        if not self.checkpoint_path:
+            return False
+        now = time.monotonic()
+        if min_interval and now - self._last_persist < min_interval:
+            return False
+        # 写入前先记录时间，写入期间到达的事件不会再发起写入
+        self._last_persist = now
+        content = f"{self.last_checked_block}\n{self.last_event[0]} {self.last_event[1]}\n"
+        async with self._persist_lock:
+            try:
+                await asyncio.to_thread(self._write_checkpoint, content)
+                return True
+            except OSError as e:
+                logger.error("保存区块检查点失败: %s", e)
+                return False
+
+    def _write_checkpoint(self, content: str):
+        """先写入临时文件再替换检查点文件"""
+        path = Path(self.checkpoint_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(content)
+        os.replace(tmp_path, path)
@@ -1,16 +1,23 @@
 import asyncio
+from config.settings import Config
 from core.monitor import YEIMonitor
+from utils.alerts import AlertManager
 from utils.logger import setup_logger
 from utils.heartbeat import HeartbeatMonitor
 
 logger = setup_logger(__name__)
 
-async def async_main():
-    """异步主函数"""
+async def run_monitor():
+    """运行心跳监控和主监控
+
+    由main()或Windows服务在同一进程内调用，取消该协程即可停止监控
+    """
+    # 心跳监控和主监控共用同一个AlertManager，同时到达的通知合并发送
+    alert_manager = AlertManager(Config.BARK_KEY, Config.BARK_SERVER)
+    
+    # 创建心跳监控
+    heartbeat = HeartbeatMonitor(alert_manager)
     try:
-        # 创建心跳监控
-        heartbeat = HeartbeatMonitor()
-        
         # 发送启动通知
         await heartbeat._send_heartbeat("系统启动")
         
@@ -18,23 +25,34 @@ async def async_main():
         heartbeat_task = asyncio.create_task(heartbeat.start())
         
         # 启动主监控
-        monitor = YEIMonitor()
+        monitor = YEIMonitor(alert_manager)
         monitor_task = asyncio.create_task(monitor.run())
         
         # 等待任务完成
         await asyncio.gather(monitor_task, heartbeat_task)
         
     except Exception as e:
-        logger.error(f"程序异常退出: {str(e)}")
+        logger.error("程序异常退出: %s", e)
+    finally:
+        await heartbeat.close()
+
+def _use_uvloop():
+    """安装了uvloop时使用uvloop作为事件循环（不支持Windows），否则使用默认事件循环"""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 def main():
     """主函数"""
+    _use_uvloop()
     try:
-        asyncio.run(async_main())
+        asyncio.run(run_monitor())
     except KeyboardInterrupt:
         logger.info("监控系统已停止")
     except Exception as e:
-        logger.error(f"程序异常退出: {str(e)}")
+        logger.error("程序异常退出: %s", e)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
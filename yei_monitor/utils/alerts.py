@@ -1,5 +1,7 @@
-import urllib.parse
-import requests
+import asyncio
+import functools
+import random
+import aiohttp
 import time
 import logging
 from typing import Dict, Any, Optional
@@ -7,18 +9,195 @@ from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# 待发送警报队列的最大长度，队列满时丢弃最早的警报
+ALERT_QUEUE_SIZE = 256
+# 关闭时等待队列中剩余警报发送完成的最长时间（秒），
+# 需小于Windows服务停止时等待清理完成的5秒，留出关闭RPC会话等清理的时间
+ALERT_FLUSH_TIMEOUT = 3
+# 取出第一条通知后等待该时间（秒）收集同时到达的通知，合并为一次Bark请求
+BATCH_WINDOW = 0.2
+# 一次Bark请求最多合并的通知数
+BATCH_MAX_SIZE = 10
+# 相同警报发送完成后该时间内（秒）再次出现时视为重复，不再发送
+ALERT_DEDUPE_TTL = 2.0
+# 每条Bark请求的最多尝试次数
+BARK_ATTEMPTS = 2
+# Bark请求连续失败该次数后熔断，熔断期间直接放弃发送
+BREAKER_THRESHOLD = 5
+# 熔断持续时间（秒），之后放行一次试探请求，成功则恢复
+BREAKER_COOLDOWN = 60.0
+
+# 通知图标
+BARK_ICON = "https://sei.io/favicon.ico"
+
+@functools.lru_cache(maxsize=64)
+def _static_params(group: str, sound: str, level: str, is_high_risk: bool, call: str) -> tuple:
+    """构建通知中除标题和内容外的固定参数，相同的参数组合只构建一次
+
+    Returns:
+        tuple: 参数键值对，发送时与标题和内容合并为请求体
+    """
+    params = {
+        "group": group,
+        "sound": sound,
+        "icon": BARK_ICON,
+        "level": level,
+        "call": call
+    }
+    # 添加高风险参数
+    if is_high_risk:
+        params["badge"] = "1"
+        params["isArchive"] = "1"
+    return tuple(params.items())
+
+class BatchingSender:
+    """合并短时间内到达的多条通知，通过一次Bark请求发送
+
+    通知先放入有界队列，由一个后台任务发送；后台任务取出第一条通知后，再等待最多window秒
+    收集其余通知，凑满max_batch条时立即发送。队列已满时丢弃最早的通知，关闭后不再接受新通知
+    """
+
+    def __init__(self, send, window: float = BATCH_WINDOW, max_batch: int = BATCH_MAX_SIZE,
+                 maxsize: int = ALERT_QUEUE_SIZE):
+        """
+        Args:
+            send: 发送一条通知的协程函数，参数与AlertManager.send_bark_notification相同，返回是否成功
+            window: 合并通知的时间窗口（秒）
+            max_batch: 一次请求最多合并的通知数
+            maxsize: 队列最大长度
+        """
+        self._send = send
+        self._window = window
+        self._max_batch = max_batch
+        self._maxsize = maxsize
+        # 首次放入通知时创建，此时事件循环已在运行
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def enqueue(self, notification: dict) -> asyncio.Future:
+        """放入一条通知
+
+        Args:
+            notification: send_bark_notification的参数字典
+
+        Returns:
+            asyncio.Future: 发送完成后结果为是否成功，被丢弃或关闭后放入时为已取消状态
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self._closed:
+            logger.warning("通知发送器已关闭，丢弃通知: %s", notification['title'])
+            future.cancel()
+            return future
+
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._maxsize)
+            self._worker = asyncio.create_task(self._run())
+
+        if self._queue.full():
+            dropped, dropped_future = self._queue.get_nowait()
+            self._queue.task_done()
+            dropped_future.cancel()
+            logger.warning("通知队列已满，丢弃最早的通知: %s", dropped['title'])
+
+        self._queue.put_nowait((notification, future))
+        return future
+
+    async def _run(self):
+        """取出一批通知，合并后发送"""
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self._window
+            while len(batch) < self._max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            success = False
+            try:
+                success = await self._send(**self._merge([notification for notification, _ in batch]))
+            except Exception as e:
+                logger.error("发送通知过程中发生错误: %s", e)
+            finally:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(success)
+                    queue.task_done()
+
+    @staticmethod
+    def _merge(notifications: list) -> dict:
+        """将多条通知合并为一条，标题和提示方式使用其中最紧急的通知"""
+        if len(notifications) == 1:
+            return notifications[0]
+
+        lead = max(notifications, key=lambda n: (n.get('is_high_risk', False), n.get('call') == "1"))
+        merged = dict(lead)
+        merged['title'] = f"{lead['title']}（{len(notifications)}条）"
+        merged['message'] = "\n\n---\n\n".join(f"【{n['title']}】\n{n['message']}" for n in notifications)
+        return merged
+
+    async def close(self):
+        """不再接受新通知，等待队列中的通知发送完成，然后停止后台任务"""
+        self._closed = True
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=ALERT_FLUSH_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("关闭时仍有 %d 条通知未发送", self._queue.qsize())
+        self._worker.cancel()
+        self._worker = None
+
 class AlertManager:
     def __init__(self, bark_key: str, bark_server: str):
         self.bark_key = bark_key
         self.bark_server = bark_server.rstrip('/')  # 移除末尾的斜杠
         # 构建完整的Bark URL基础部分
         self.bark_base_url = f"{self.bark_server}/{self.bark_key}" if self.bark_key else ""
-        logger.info(f"初始化AlertManager，Bark基础URL: {self.bark_base_url}")
+        # 所有通知共享同一个HTTP会话，复用到Bark服务器的keep-alive连接
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Bark请求熔断器状态：closed（正常）/open（熔断）/half-open（试探中）
+        self._breaker_state = 'closed'
+        self._breaker_fails = 0
+        self._breaker_opened_at = 0.0
+        # 通知先放入队列，由后台任务合并发送，Bark响应慢时不阻塞事件处理
+        self._sender = BatchingSender(self.send_bark_notification)
+        # 已在队列中或正在发送的警报，以及最近发送完成的警报 {键: 过期时间}，用于合并重复警报
+        self._inflight = set()
+        self._recent = {}
+        logger.info("初始化AlertManager，Bark基础URL: %s", self.bark_base_url)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的HTTP会话，首次使用时创建"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, keepalive_timeout=60),
+                # 连接和读取分别设置超时，Bark服务器无响应时尽快失败；
+                # 不设置total，避免把在连接池中排队等待的时间也算作超时
+                timeout=aiohttp.ClientTimeout(connect=3, sock_connect=3, sock_read=7)
+            )
+        return self._session
+
+    async def close(self):
+        """等待队列中的通知发送完成，停止后台任务并关闭共享的HTTP会话"""
+        await self._sender.close()
         
-    def send_bark_notification(self, title: str, message: str, group: str = "YEI监控", 
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        
+    async def send_bark_notification(self, title: str, message: str, group: str = "YEI监控", 
                               sound: str = "bell", level: str = "active", is_high_risk: bool = False, call: str = "0"):
         """通用的Bark通知发送函数
         
+        连续失败BREAKER_THRESHOLD次后熔断BREAKER_COOLDOWN秒，熔断期间直接返回False
+        
         Args:
             title: 通知标题
             message: 通知内容
@@ -33,106 +212,146 @@ class AlertManager:
         if not self.bark_base_url:
             logger.warning("未配置Bark URL，无法发送通知")
             return False
-            
+        
+        if not self._breaker_allows():
+            logger.warning("Bark请求已熔断，跳过通知: %s", title)
+            return False
+        
+        success = False
         try:
-            # URL编码标题和消息
-            encoded_title = urllib.parse.quote(title)
-            encoded_message = urllib.parse.quote(message)
-            
-            # 构建基本URL
-            url = f"{self.bark_base_url}/{encoded_title}/{encoded_message}"
-            
-            # 添加参数
-            params = {
-                "group": group,
-                "sound": sound,
-                "icon": "https://sei.io/favicon.ico",
-                "level": level,
-                "call": call
-            }
-            
-            # 添加高风险参数
-            if is_high_risk:
-                params["badge"] = "1"
-                params["isArchive"] = "1"
-            
-            # 构建查询字符串
-            query_string = "&".join([f"{k}={urllib.parse.quote(str(v))}" for k, v in params.items()])
-            full_url = f"{url}?{query_string}"
-            
-            logger.debug(f"发送Bark通知，URL: {full_url}")
-            
-            # 使用requests发送GET请求
-            response = requests.get(full_url, timeout=15)
-            
-            if response.status_code == 200:
-                logger.info(f"成功发送Bark通知: {title}")
-                return True
-            else:
-                logger.error(f"Bark API返回错误: {response.status_code} - {response.text}")
+            success = await self._send_bark_request(title, message, group, sound, level, is_high_risk, call)
+        finally:
+            # 请求被取消时也记录为失败，避免试探状态无法结束
+            self._breaker_record(success)
+        return success
+
+    def _breaker_allows(self) -> bool:
+        """熔断器是否允许发送请求，熔断时间结束后放行一次试探请求"""
+        if self._breaker_state == 'closed':
+            return True
+        if self._breaker_state == 'open' and time.time() - self._breaker_opened_at >= BREAKER_COOLDOWN:
+            self._breaker_state = 'half-open'
+            return True
+        # 熔断中，或试探请求尚未返回
+        return False
+
+    def _breaker_record(self, success: bool):
+        """记录请求结果，连续失败达到阈值或试探请求失败时熔断"""
+        if success:
+            if self._breaker_state != 'closed':
+                logger.info("Bark请求已恢复")
+            self._breaker_state = 'closed'
+            self._breaker_fails = 0
+            return
+        
+        self._breaker_fails += 1
+        if self._breaker_state == 'half-open' or self._breaker_fails >= BREAKER_THRESHOLD:
+            self._breaker_state = 'open'
+            self._breaker_opened_at = time.time()
+            logger.error("Bark请求连续失败 %d 次，%.0f秒内不再发送通知", self._breaker_fails, BREAKER_COOLDOWN)
+
+    async def _send_bark_request(self, title: str, message: str, group: str, sound: str,
+                                 level: str, is_high_risk: bool, call: str) -> bool:
+        """发送Bark请求，网络错误或服务器错误时按指数退避加随机抖动重试，最多BARK_ATTEMPTS次"""
+        # 通过POST JSON发送，消息放在请求体中，无需URL编码，也不受URL长度限制
+        payload = {"title": title, "body": message}
+        payload.update(_static_params(group, sound, level, is_high_risk, call))
+        
+        for attempt in range(BARK_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(0.1 * 2 ** attempt + random.random() * 0.05)
+            try:
+                logger.debug("发送Bark通知: %s", title)
                 
-                # 尝试最简单的URL格式
-                simple_url = f"{self.bark_base_url}/{encoded_title}/{encoded_message}"
-                logger.debug(f"尝试使用最简单的URL: {simple_url}")
-                simple_response = requests.get(simple_url, timeout=15)
+                # 通过共享会话发送POST请求
+                session = await self._get_session()
+                async with session.post(self.bark_base_url, json=payload) as response:
+                    status = response.status
+                    response_text = await response.text()
                 
-                if simple_response.status_code == 200:
-                    logger.info("使用简单URL成功发送Bark通知")
+                if status == 200:
+                    logger.info("成功发送Bark通知: %s", title)
                     return True
-                else:
-                    logger.error(f"简单URL也失败: {simple_response.status_code}")
+                logger.error("Bark API返回错误: %s - %s", status, response_text)
+                # 请求本身有误（如Bark key无效）时重试也不会成功
+                if status < 500 and status != 429:
                     return False
-                
-        except Exception as e:
-            logger.error(f"发送Bark通知失败: {str(e)}")
-            
-            # 尝试使用最简单的URL格式作为最后的尝试
-            try:
-                simple_url = f"{self.bark_base_url}/{urllib.parse.quote(title)}/{urllib.parse.quote(message)}"
-                logger.debug(f"最后尝试: {simple_url}")
-                last_response = requests.get(simple_url, timeout=15)
-                return last_response.status_code == 200
-            except Exception as e2:
-                logger.error(f"最后尝试也失败: {str(e2)}")
-                return False
+            except Exception as e:
+                logger.error("发送Bark通知失败: %s", e)
+        
+        return False
+
+    async def send_notification(self, title: str, message: str, group: str = "YEI监控",
+                                sound: str = "bell", level: str = "active", is_high_risk: bool = False, call: str = "0") -> bool:
+        """通过队列发送通知，与同时到达的其他通知合并为一次Bark请求
+        
+        参数与send_bark_notification相同
+        
+        Returns:
+            bool: 是否发送成功
+        """
+        future = self._sender.enqueue({
+            "title": title,
+            "message": message,
+            "group": group,
+            "sound": sound,
+            "level": level,
+            "is_high_risk": is_high_risk,
+            "call": call
+        })
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # 通知因队列已满或发送器已关闭被丢弃
+            return False
 
     async def send_alert(self, message: str, data: Optional[Dict[str, Any]] = None, is_high_risk: bool = False, call_value: str = "0"):
         """发送警报
         
+        警报放入队列后立即返回，由后台任务与同时到达的其他通知合并发送。队列已满时丢弃最早的通知。
+        与已在队列中、正在发送或ALERT_DEDUPE_TTL秒内刚发送的警报内容相同时直接忽略
+        
         Args:
             message: 警报消息
             data: 详细数据
             is_high_risk: 是否为高风险警报
             call_value: 是否进行语音通知，"1"表示通知，"0"表示不通知
         """
-        try:
-            # 记录日志
-            logger.warning(f"警报: {message}")
-            if data:
-                logger.warning(f"详细信息: {data}")
-
-            # 构建通知内容
-            title = "⚠️ YEI安全警报 ⚠️" if is_high_risk else "YEI监控警报"
-            
-            # 使用通用函数发送通知
-            sound = "shake" if is_high_risk else "warning"
-            
-            success = self.send_bark_notification(
-                title=title,
-                message=message,
-                group="YEI监控-警报",
-                sound=sound,
-                level="critical" if is_high_risk else "active",
-                is_high_risk=is_high_risk,
-                call=call_value
-            )
-            
-            if success:
-                logger.info(f"成功发送{'高风险' if is_high_risk else ''}警报通知")
-            else:
-                logger.error("发送警报通知失败")
-                
-        except Exception as e:
-            logger.error(f"发送警报过程中发生错误: {str(e)}")
-            
-    
\ No newline at end of file
+        # 合并重复警报
+        key = (message, is_high_risk)
+        now = time.time()
+        if key in self._inflight or self._recent.get(key, 0) > now:
+            logger.debug("忽略重复警报: %.50s", message)
+            return
+        if len(self._recent) > ALERT_QUEUE_SIZE:
+            self._recent = {k: expires for k, expires in self._recent.items() if expires > now}
+        
+        # 记录日志
+        logger.warning("警报: %s", message)
+        if data:
+            logger.warning("详细信息: %s", data)
+        
+        future = self._sender.enqueue({
+            "title": "⚠️ YEI安全警报 ⚠️" if is_high_risk else "YEI监控警报",
+            "message": message,
+            "group": "YEI监控-警报",
+            "sound": "shake" if is_high_risk else "warning",
+            "level": "timeSensitive" if is_high_risk else "active",
+            "is_high_risk": is_high_risk,
+            "call": call_value
+        })
+        self._inflight.add(key)
+        future.add_done_callback(lambda f: self._alert_done(key, is_high_risk, f))
+
+    def _alert_done(self, key: tuple, is_high_risk: bool, future: asyncio.Future):
+        """警报发送完成或被丢弃后记录结果"""
+        self._inflight.discard(key)
+        self._recent[key] = time.time() + ALERT_DEDUPE_TTL
+        if future.cancelled():
+            return
+        if future.result():
+            logger.info("成功发送%s警报通知", "高风险" if is_high_risk else "")
+        else:
+            logger.error("发送警报通知失败")
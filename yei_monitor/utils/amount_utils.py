@@ -1,5 +1,7 @@
+import functools
 from decimal import Decimal, getcontext
-from typing import Union, Dict, Optional
+from typing import Union, Dict, NamedTuple, Optional
+from eth_utils import to_checksum_address
 
 # 设置高精度小数运算
 getcontext().prec = 36
@@ -7,26 +9,45 @@ getcontext().prec = 36
 # 资产符号与精度的映射（常见ERC20代币的精度）
 DEFAULT_DECIMALS = 18  # 大多数ERC20代币使用18位精度
 
+class TokenInfo(NamedTuple):
+    """代币信息，精度换算除数在创建时预先计算"""
+    symbol: str
+    decimals: int
+    scale: Decimal                             # Decimal(10) ** decimals，格式化金额使用
+    divisor: int                               # 10 ** decimals，换算事件金额使用
+    limit: Optional[float] = None              # 事件金额达到该值时发送重要通知
+    liquidation_limit: Optional[float] = None  # 清算金额小于该值时不发送通知
+
+def _token(symbol: str, decimals: int, limit: float = None, liquidation_limit: float = None) -> TokenInfo:
+    """创建代币信息"""
+    return TokenInfo(symbol, decimals, Decimal(10) ** decimals, 10 ** decimals, limit, liquidation_limit)
+
 # 常见稳定币和资产的精度映射
 # 所有地址均使用小写，便于查询
-TOKEN_DECIMALS: Dict[str, dict] = {
+TOKEN_DECIMALS: Dict[str, TokenInfo] = {
     # 初始预设常见代币，将由动态获取的数据补充
     # 如果合约调用失败，至少有这些基础代币信息
-    "0x3894085ef7ff0f0aedf52e2a2704928d1ec074f1": {"symbol": "USDC", "decimals": 6, "limit": 200000, "liquidation_limit": 100},
-    "0xe30fedd158a2e3b13e9badaeabafc5516e95e8c7": {"symbol": "WSEI", "decimals": 18, "limit": 1000000, "liquidation_limit": 500},
-    "0x5cf6826140c1c56ff49c808a1a75407cd1df9423": {"symbol": "ISEI", "decimals": 6, "limit": 1000000, "liquidation_limit": 500 },
-    "0x160345fc359604fc6e70e3c5facbde5f7a9342d8": {"symbol": "WETH", "decimals": 18, "limit": 100, "liquidation_limit": 0.05},
-    "0x0555e30da8f98308edb960aa94c0db47230d2b9c": {"symbol": "WBTC", "decimals": 8, "limit": 2, "liquidation_limit": 0.001},
-    "0x37a4dd9ced2b19cfe8fac251cd727b5787e45269": {"symbol": "fastUSD", "decimals": 18, "limit": 200000, "liquidation_limit": 100},
-    "0x541fd749419ca806a8bc7da8ac23d346f2df8b77": {"symbol": "SolvBTC", "decimals": 18, "limit": 2, "liquidation_limit": 0.001},
-    "0xb75d0b03c06a926e488e2659df1a861f860bd3d1": {"symbol": "USDT", "decimals": 6, "limit": 200000, "liquidation_limit": 100},
-    "0xdf77686d99667ae56bc18f539b777dbc2bbe3e9f": {"symbol": "sfastUSD", "decimals": 18, "limit": 200000, "liquidation_limit": 100},
-    "0x80eede496655fb9047dd39d9f418d5483ed600df": {"symbol": "frxUSD", "decimals": 18, "limit": 200000, "liquidation_limit": 100},
-    "0x3ec3849c33291a9ef4c5db86de593eb4a37fde45": {"symbol": "sfrxETH", "decimals": 18, "limit": 100, "liquidation_limit": 0.05},
-    "0x5bff88ca1442c2496f7e475e9e7786383bc070c0": {"symbol": "sfrxUSD", "decimals": 18, "limit": 200000, "liquidation_limit": 100},
-    "0x43edd7f3831b08fe70b7555ddd373c8bf65a9050": {"symbol": "frxETH", "decimals": 18, "limit": 100, "liquidation_limit": 0.05},
+    "0x3894085ef7ff0f0aedf52e2a2704928d1ec074f1": _token("USDC", 6, limit=200000, liquidation_limit=100),
+    "0xe30fedd158a2e3b13e9badaeabafc5516e95e8c7": _token("WSEI", 18, limit=1000000, liquidation_limit=500),
+    "0x5cf6826140c1c56ff49c808a1a75407cd1df9423": _token("ISEI", 6, limit=1000000, liquidation_limit=500),
+    "0x160345fc359604fc6e70e3c5facbde5f7a9342d8": _token("WETH", 18, limit=100, liquidation_limit=0.05),
+    "0x0555e30da8f98308edb960aa94c0db47230d2b9c": _token("WBTC", 8, limit=2, liquidation_limit=0.001),
+    "0x37a4dd9ced2b19cfe8fac251cd727b5787e45269": _token("fastUSD", 18, limit=200000, liquidation_limit=100),
+    "0x541fd749419ca806a8bc7da8ac23d346f2df8b77": _token("SolvBTC", 18, limit=2, liquidation_limit=0.001),
+    "0xb75d0b03c06a926e488e2659df1a861f860bd3d1": _token("USDT", 6, limit=200000, liquidation_limit=100),
+    "0xdf77686d99667ae56bc18f539b777dbc2bbe3e9f": _token("sfastUSD", 18, limit=200000, liquidation_limit=100),
+    "0x80eede496655fb9047dd39d9f418d5483ed600df": _token("frxUSD", 18, limit=200000, liquidation_limit=100),
+    "0x3ec3849c33291a9ef4c5db86de593eb4a37fde45": _token("sfrxETH", 18, limit=100, liquidation_limit=0.05),
+    "0x5bff88ca1442c2496f7e475e9e7786383bc070c0": _token("sfrxUSD", 18, limit=200000, liquidation_limit=100),
+    "0x43edd7f3831b08fe70b7555ddd373c8bf65a9050": _token("frxETH", 18, limit=100, liquidation_limit=0.05),
 }
 
+_DEFAULT_SCALE = Decimal(10) ** DEFAULT_DECIMALS
+
+# 判断利率精度的阈值，超过时视为RAY (10^27)精度
+_D_1E20 = Decimal('1e20')
+
+@functools.lru_cache(maxsize=1024)
 def get_token_name(asset_address: str) -> str:
     """
     从合约地址获取代币名称
@@ -37,33 +58,52 @@ def get_token_name(asset_address: str) -> str:
     Returns:
         代币名称/符号，如果未知则返回缩短的地址
     """
-    # 直接使用小写地址查找
     token_info = TOKEN_DECIMALS.get(asset_address.lower())
     if token_info:
-        return token_info["symbol"]
+        return token_info.symbol
     
-    # 如果找不到对应的代币符号，返回缩短的地址
-    return f"{asset_address[:6]}...{asset_address[-4:]}"
+    # 如果找不到对应的代币符号，返回缩短的地址；传入的地址为小写，显示时转换为校验和格式
+    checksum_address = to_checksum_address(asset_address)
+    return f"{checksum_address[:6]}...{checksum_address[-4:]}"
+
+@functools.lru_cache(maxsize=1024)
+def _lookup(asset_address: str) -> tuple:
+    """
+    获取资产的精度换算除数和符号，结果按地址缓存
+    
+    Args:
+        asset_address: 资产合约地址（任意大小写）
+        
+    Returns:
+        (精度换算除数, 代币符号)，未知资产为(默认除数, "")
+    """
+    token_info = TOKEN_DECIMALS.get(asset_address.lower())
+    if token_info:
+        return token_info.scale, token_info.symbol
+    return _DEFAULT_SCALE, ""
 
-def format_large_number(number: Decimal) -> str:
+def format_large_number(number: Union[Decimal, float]) -> str:
     """
     将大数字格式化为易读的形式，使用K、M、B等单位
     
+    结果只用于显示，保留2位小数，使用浮点数计算即可
+    
     Args:
         number: 要格式化的数字
         
     Returns:
         格式化后的字符串
     """
-    abs_num = abs(number)
-    if abs_num >= Decimal('1e9'):
-        return f"{(number / Decimal('1e9')).quantize(Decimal('0.01'))}B"
-    elif abs_num >= Decimal('1e6'):
-        return f"{(number / Decimal('1e6')).quantize(Decimal('0.01'))}M"
-    elif abs_num >= Decimal('1e3'):
-        return f"{(number / Decimal('1e3')).quantize(Decimal('0.01'))}K"
+    x = float(number)
+    abs_num = abs(x)
+    if abs_num >= 1e9:
+        return f"{x / 1e9:.2f}B"
+    elif abs_num >= 1e6:
+        return f"{x / 1e6:.2f}M"
+    elif abs_num >= 1e3:
+        return f"{x / 1e3:.2f}K"
     else:
-        return str(number.quantize(Decimal('0.01')))
+        return f"{x:.2f}"
 
 def format_amount(amount: Union[int, str], asset_address: Optional[str] = None) -> str:
     """
@@ -77,22 +117,14 @@ def format_amount(amount: Union[int, str], asset_address: Optional[str] = None)
         格式化后的金额字符串
     """
     try:
-        # 转换为Decimal以确保精度
-        raw_amount = Decimal(str(amount))
-        
-        # 获取资产的精度
-        decimals = DEFAULT_DECIMALS
-        symbol = ""
+        # 转换为Decimal以确保精度，整数无需经过字符串转换
+        raw_amount = Decimal(amount) if isinstance(amount, int) else Decimal(str(amount))
         
-        if asset_address:
-            # 直接使用小写地址查找
-            token_info = TOKEN_DECIMALS.get(asset_address.lower())
-            if token_info:
-                decimals = token_info["decimals"]
-                symbol = token_info["symbol"]
+        # 获取资产的精度换算除数和符号
+        scale, symbol = _lookup(asset_address) if asset_address else (_DEFAULT_SCALE, "")
         
         # 应用精度转换
-        formatted_amount = raw_amount / (Decimal(10) ** decimals)
+        formatted_amount = raw_amount / scale
         
         # 使用新的格式化函数
         result = format_large_number(formatted_amount)
@@ -135,17 +167,16 @@ def format_interest_rate(rate: Union[int, str]) -> str:
     """
     try:
         # 转换为Decimal以确保精度
-        raw_rate = Decimal(str(rate))
+        raw_rate = Decimal(rate) if isinstance(rate, int) else Decimal(str(rate))
         
-        # 尝试确定精度
-        if raw_rate > Decimal('1e20'):  # 可能是RAY (10^27)
-            formatted_rate = raw_rate / Decimal('1e27') * 100
+        # 尝试确定精度，换算为百分比只用于显示，使用浮点数计算
+        if raw_rate > _D_1E20:  # 可能是RAY (10^27)
+            formatted_rate = float(raw_rate) / 1e27 * 100
         else:  # 假设是WAD (10^18)
-            formatted_rate = raw_rate / Decimal('1e18') * 100
+            formatted_rate = float(raw_rate) / 1e18 * 100
         
-        # 格式化输出，保留2位小数
-        result = str(formatted_rate.quantize(Decimal('0.01')))
-        result = result.rstrip('0').rstrip('.') if '.' in result else result
+        # 格式化输出，保留2位小数并去掉末尾的0
+        result = f"{formatted_rate:.2f}".rstrip('0').rstrip('.')
         
         return f"{result}%"
     except Exception as e:
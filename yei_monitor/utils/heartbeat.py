@@ -1,64 +1,54 @@
 import asyncio
-import logging
-from datetime import datetime
+from datetime import datetime, time, timedelta
 import os
 from dotenv import load_dotenv
 from utils.alerts import AlertManager
 from config.settings import Config
+from utils.logger import setup_logger
 
 # 加载环境变量
 load_dotenv()
 
-logger = logging.getLogger("HeartbeatMonitor")
+logger = setup_logger("HeartbeatMonitor")
+
+# 每天发送心跳的整点时刻 -> 时段名称
+HEARTBEAT_SCHEDULE = {8: "早间", 12: "午间", 20: "晚间"}
 
 class HeartbeatMonitor:
-    def __init__(self):
+    def __init__(self, alert_manager: AlertManager = None):
         self.logger = logger
-        self.morning_sent = False
-        self.noon_sent = False
-        self.evening_sent = False
-        # 创建AlertManager实例
-        self.alert_manager = AlertManager(Config.BARK_KEY, Config.BARK_SERVER)
+        # 与主监控共用AlertManager时，心跳和同时到达的警报合并为一次Bark请求
+        self.alert_manager = alert_manager or AlertManager(Config.BARK_KEY, Config.BARK_SERVER)
         
     async def start(self):
-        """启动心跳监控"""
+        """启动心跳监控，休眠到下一个心跳时刻再发送"""
         self.logger.info("心跳监控已启动")
+        after = datetime.now()
         while True:
             try:
-                await self._check_heartbeat()
-                # 每10分钟检查一次
-                await asyncio.sleep(600)
+                next_time, time_period = self._next_heartbeat(after)
+                await asyncio.sleep(max(0, (next_time - datetime.now()).total_seconds()))
+                await self._send_heartbeat(time_period)
+                # 提前醒来时也从本次心跳时刻之后计算，避免重复发送
+                after = max(datetime.now(), next_time)
             except Exception as e:
-                self.logger.error(f"心跳检测出错: {str(e)}")
+                self.logger.error("心跳检测出错: %s", e)
                 await asyncio.sleep(300)
     
-    async def _check_heartbeat(self):
-        """检查是否需要发送心跳通知"""
-        now = datetime.now()
-        current_hour = now.hour
-        
-        # 早上8点发送
-        if 8 <= current_hour < 9 and not self.morning_sent:
-            await self._send_heartbeat("早间")
-            self.morning_sent = True
-            self.noon_sent = False
-            self.evening_sent = False
-        
-        # 中午12点发送
-        elif 12 <= current_hour < 13 and not self.noon_sent:
-            await self._send_heartbeat("午间")
-            self.noon_sent = True
+    @staticmethod
+    def _next_heartbeat(now: datetime) -> tuple:
+        """计算now之后的下一个心跳时刻
         
-        # 晚上8点发送
-        elif 20 <= current_hour < 21 and not self.evening_sent:
-            await self._send_heartbeat("晚间")
-            self.evening_sent = True
-        
-        # 重置状态（第二天）
-        elif current_hour < 8:
-            self.morning_sent = False
-            self.noon_sent = False
-            self.evening_sent = False
+        Returns:
+            tuple: (下一个心跳时间, 时段名称)
+        """
+        for hour, time_period in HEARTBEAT_SCHEDULE.items():
+            target = datetime.combine(now.date(), time(hour))
+            if target > now:
+                return target, time_period
+        # 今天的心跳都已发送，下一个为明天的第一个
+        hour, time_period = next(iter(HEARTBEAT_SCHEDULE.items()))
+        return datetime.combine(now.date() + timedelta(days=1), time(hour)), time_period
     
     async def _send_heartbeat(self, time_period):
         """发送心跳通知"""
@@ -67,8 +57,8 @@ class HeartbeatMonitor:
             title = f"YEI监控系统 - {time_period}心跳"
             content = f"系统正常运行中\n时间: {current_time}"
             
-            # 使用AlertManager发送通知
-            success = self.alert_manager.send_bark_notification(
+            # 通过AlertManager的发送队列发送通知
+            success = await self.alert_manager.send_notification(
                 title=title,
                 message=content,
                 group="YEI监控-心跳",
@@ -77,14 +67,32 @@ class HeartbeatMonitor:
             )
             
             if success:
-                self.logger.info(f"{time_period}心跳通知发送成功")
+                self.logger.info("%s心跳通知发送成功", time_period)
             else:
-                self.logger.error(f"{time_period}心跳通知发送失败")
+                self.logger.error("%s心跳通知发送失败", time_period)
                 
         except Exception as e:
-            self.logger.error(f"{time_period}心跳通知发送出错: {str(e)}")
+            self.logger.error("%s心跳通知发送出错: %s", time_period, e)
+            
+    async def close(self):
+        """关闭通知使用的HTTP会话"""
+        await self.alert_manager.close()
             
     def send_immediate_heartbeat(self):
-        """立即发送一次心跳通知"""
-        loop = asyncio.get_event_loop()
-        loop.create_task(self._send_heartbeat("即时")) 
\ No newline at end of file
+        """立即发送一次心跳通知
+        
+        在事件循环中调用时创建任务后返回，没有运行中的事件循环时同步发送完成后返回
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self._send_and_close("即时"))
+            return
+        loop.create_task(self._send_heartbeat("即时"))
+    
+    async def _send_and_close(self, time_period):
+        """发送一次心跳后关闭HTTP会话，用于临时创建的事件循环"""
+        try:
+            await self._send_heartbeat(time_period)
+        finally:
+            await self.close()
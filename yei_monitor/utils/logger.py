@@ -1,31 +1,94 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, SocketHandler
 
-def setup_logger(name: str, level=logging.DEBUG) -> logging.Logger:
-    """设置日志"""
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
+# 日志输出方式：
+# - queue-file: 日志记录先放入队列，由后台线程写入文件和控制台（默认）
+# - socket: 日志记录先放入队列，由后台线程发送到本地日志服务（如Vector/Fluent Bit）和控制台
+# - rotating: 直接在调用线程中写入文件和控制台
+LOG_HANDLERS = ('queue-file', 'socket', 'rotating')
+
+# 每种输出方式的处理器只创建一次，所有模块共享
+_handlers = {}
+
+def _log_level() -> str:
+    """日志级别，读取环境变量LOG_LEVEL，未设置时为INFO"""
+    return os.getenv('LOG_LEVEL', 'INFO').upper()
 
-    # 文件处理器
+def _create_file_handler() -> logging.Handler:
+    """创建文件处理器"""
     file_handler = RotatingFileHandler(
         'yei_monitor.log',
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'  # 添加UTF-8编码设置
+        maxBytes=50*1024*1024,  # 50MB，减少轮转次数
+        backupCount=3,
+        encoding='utf-8',  # 添加UTF-8编码设置
+        delay=True  # 首次写入时才打开文件
     )
+    file_handler.setLevel(_log_level())
     file_handler.setFormatter(
         logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     )
-    file_handler.setLevel(level)
+    return file_handler
 
-    # 控制台处理器
+def _create_console_handler() -> logging.Handler:
+    """创建控制台处理器"""
     console_handler = logging.StreamHandler()
+    # 控制台只输出INFO及以上级别，DEBUG日志只写入文件
+    console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(
         logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
     )
-    console_handler.setLevel(level)
+    return console_handler
+
+def _create_socket_handler() -> logging.Handler:
+    """创建发送到本地日志服务的处理器"""
+    host = os.getenv('LOG_SOCKET_HOST', '127.0.0.1')
+    port = int(os.getenv('LOG_SOCKET_PORT', '9020'))
+    socket_handler = SocketHandler(host, port)
+    socket_handler.setLevel(_log_level())
+    return socket_handler
+
+def _start_queue_listener(*handlers: logging.Handler) -> QueueHandler:
+    """创建队列处理器，并在后台线程中把日志记录交给实际的处理器"""
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # 退出时停止后台线程，确保队列中剩余的日志写入完成
+    atexit.register(listener.stop)
+    return QueueHandler(log_queue)
+
+def _get_handlers(handler: str) -> list:
+    """获取指定输出方式共享的处理器列表"""
+    if handler not in _handlers:
+        if handler == 'queue-file':
+            _handlers[handler] = [_start_queue_listener(_create_file_handler(), _create_console_handler())]
+        elif handler == 'socket':
+            _handlers[handler] = [_start_queue_listener(_create_socket_handler(), _create_console_handler())]
+        elif handler == 'rotating':
+            _handlers[handler] = [_create_file_handler(), _create_console_handler()]
+        else:
+            raise ValueError(f"不支持的日志输出方式: {handler}，可选值: {', '.join(LOG_HANDLERS)}")
+    return _handlers[handler]
+
+def setup_logger(name: str, level=None, handler: str = None) -> logging.Logger:
+    """设置日志
+
+    Args:
+        name: 日志名称
+        level: 日志级别，默认读取环境变量LOG_LEVEL，未设置时为INFO
+        handler: 日志输出方式（queue-file/socket/rotating），默认读取环境变量LOG_HANDLER，未设置时为queue-file
+    """
+    logger = logging.getLogger(name)
+    # 同一名称重复调用时不再添加处理器，避免每条日志重复输出
+    if logger.handlers:
+        return logger
+    logger.setLevel(level or _log_level())
+    # 日志已由自己的处理器输出，不再传递给根日志记录器
+    logger.propagate = False
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    for log_handler in _get_handlers(handler or os.getenv('LOG_HANDLER', 'queue-file')):
+        logger.addHandler(log_handler)
 
-    return logger 
\ No newline at end of file
+    return logger